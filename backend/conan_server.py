@@ -4,11 +4,15 @@ FastAPI server for Conan VS Code extension.
 This server provides REST API endpoints for Conan operations.
 """
 
+import logging
+import os
 import sys
 import argparse
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 
-from fastapi import HTTPException
+from fastapi import Depends, HTTPException, Request, Response
 
 try:
     from fastapi import FastAPI
@@ -22,38 +26,162 @@ except ImportError:
 try:
     from conan.api.conan_api import ConanAPI
     from conan.internal.model.settings import load_settings_yml
+    from conan.internal.cache.home_paths import HomePaths
 except ImportError:
     print("ERROR: Conan Python API not found. Make sure Conan 2.x is installed.")
     sys.exit(1)
 
 # Import route modules
-from routes.packages import router as packages_router
+from routes.packages import router as packages_router, clear_packages_inflight
 from routes.profiles import router as profiles_router
 from routes.remotes import router as remotes_router
 from routes.project import router as project_router
 from routes.new import router as new_router
-from dependencies.conan_deps import get_conan_api, set_conan_api
+from dependencies.conan_deps import (
+    get_home_folder, get_home_paths, get_profile, clear_profile_cache, clear_find_conanfile_cache
+)
+from conan_utils import (
+    cached_remotes_list, clear_authentication_cache, clear_remote_checks_cache, clear_remotes_cache, make_etag,
+    size_connection_pool, detect_rate_limiting
+)
 from models.conan_models import ConanSettings
 
+# Diagnostics go to stderr, which the extension forwards to its log. CONAN_VSC_LOG
+# selects the level (e.g. DEBUG to see every availability probe)
+_log_level = getattr(logging, os.environ.get("CONAN_VSC_LOG", "WARNING").upper(), logging.WARNING)
+logging.basicConfig(level=_log_level if isinstance(_log_level, int) else logging.WARNING,
+                    format="%(levelname)s %(name)s: %(message)s")
+logger = logging.getLogger(__name__)
+
+
+def _settings_mtimes(home_paths: HomePaths) -> tuple:
+    """Modification times of the files settings are loaded from (None when missing)."""
+    mtimes = []
+    for path in (home_paths.settings_path, home_paths.settings_path_user):
+        try:
+            mtimes.append(os.stat(path).st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    return tuple(mtimes)
+
+
+def _load_conan_settings(home_folder: str, home_paths: HomePaths) -> ConanSettings:
+    """Load settings.yml (and settings_user.yml) as ConanSettings."""
+    # Load settings using load_settings_yml
+    settings_obj = load_settings_yml(home_folder)
+
+    # Get the settings path for the response
+    settings_path = home_paths.settings_path
+
+    # Extract settings structure from the loaded Settings object
+    possible_values = settings_obj.possible_values()
+
+    # Convert to ConanSettings format
+    return ConanSettings(
+        path=settings_path,
+        os=possible_values.get("os", {}),
+        arch=tuple(possible_values.get("arch", ())),
+        compiler=possible_values.get("compiler", {}),
+        build_type=tuple(possible_values.get("build_type", ()))
+    )
+
+
+def _prewarm_conan_caches(conan_api: ConanAPI):
+    """Load the remotes and the home folder profiles so the first requests find them cached."""
+    try:
+        cached_remotes_list(conan_api)
+    except Exception as e:
+        logger.warning("Failed to preload Conan remotes: %s", e)
+
+    try:
+        profile_names = conan_api.profiles.list()
+    except Exception as e:
+        logger.warning("Failed to list Conan profiles: %s", e)
+        return
+    for profile_name in profile_names:
+        try:
+            get_profile(conan_api, profile_name)
+        except Exception as e:
+            # A broken profile only fails the requests using it, do not prevent the startup
+            logger.warning("Failed to preload Conan profile %s: %s", profile_name, e)
+
 
 @asynccontextmanager
-async def lifespan(app: FastAPI):
-    """Lifespan event handler for FastAPI application."""
+async def _conan_lifespan(app: FastAPI):
+    """Initialize the Conan API and what is derived from it."""
     # Startup
+    app.state.home_folder = None
+    app.state.home_paths = None
+    app.state.settings_cache = None
+    # Background /packages computations, see /packages/async
+    app.state.packages_tasks = {}
     try:
         conan_api = ConanAPI()
         conan_api._api_helpers.set_core_confs(["core:non_interactive=True"])
-        set_conan_api(conan_api)
-        print("Conan API initialized successfully")
+        logger.info("Conan API initialized successfully")
     except Exception as e:
-        print(f"Failed to initialize Conan API: {e}")
-        set_conan_api(None)
+        logger.error("Failed to initialize Conan API: %s", e)
+        conan_api = None
+    # Routes get it through the get_conan_api dependency
+    app.state.conan_api = conan_api
+
+    if conan_api is not None:
+        size_connection_pool(conan_api)
+        detect_rate_limiting(conan_api)
+
+        # The home folder does not change for the lifetime of the server
+        app.state.home_folder = conan_api.config.home()
+        app.state.home_paths = HomePaths(app.state.home_folder)
+
+        # Settings rarely change, load them once here and serve them from memory
+        try:
+            app.state.settings_cache = (
+                _settings_mtimes(app.state.home_paths),
+                _load_conan_settings(app.state.home_folder, app.state.home_paths))
+        except Exception as e:
+            logger.warning("Failed to preload Conan settings: %s", e)
+
+        _prewarm_conan_caches(conan_api)
 
     yield
 
     # Shutdown
-    # Add any cleanup code here if needed
-    pass
+    for _, task in app.state.packages_tasks.values():
+        task.cancel()
+    app.state.packages_tasks.clear()
+
+    # The caches belong to this Conan API instance
+    clear_authentication_cache()
+    clear_remote_checks_cache()
+    clear_remotes_cache()
+    clear_profile_cache()
+    clear_find_conanfile_cache()
+    clear_packages_inflight()
+    app.state.conan_api = None
+
+
+@asynccontextmanager
+async def _executor_lifespan(app: FastAPI):
+    """Run the blocking Conan calls in a dedicated, bounded thread pool."""
+    # Conan calls are mostly I/O bound (cache and remotes), size the pool like asyncio's
+    # default one but make it explicit and used by asyncio.to_thread as well
+    executor = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) + 4),
+                                  thread_name_prefix="conan")
+    app.state.executor = executor
+    asyncio.get_running_loop().set_default_executor(executor)
+
+    yield
+
+    app.state.executor = None
+    executor.shutdown(wait=False, cancel_futures=True)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Lifespan event handler for FastAPI application."""
+    async with _conan_lifespan(app):
+        async with _executor_lifespan(app):
+            yield
 
 
 app = FastAPI(
@@ -62,13 +190,15 @@ app = FastAPI(
     lifespan=lifespan
 )
 
-# Add CORS middleware
+# Add CORS middleware, the extension host talks to us without CORS, only VS Code webviews may
+# need it, other (web) origins must not reach the local API from a browser
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origin_regex=r"vscode-webview://[^/]+",
+    allow_credentials=False,
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type", "If-None-Match"],
+    max_age=86400,
 )
 
 # Include routers
@@ -92,38 +222,28 @@ async def health_check():
 
 
 # Legacy endpoints for backward compatibility
-@app.get("/settings")
-async def get_settings_legacy():
+@app.get("/settings", response_model=ConanSettings)
+async def get_settings_legacy(request: Request,
+                              response: Response,
+                              home_folder: str = Depends(get_home_folder),
+                              home_paths: HomePaths = Depends(get_home_paths)):
     """Get available Conan settings from settings.yml."""
-    conan_api = get_conan_api()
-    if conan_api is None:
-        raise HTTPException(status_code=500, detail="Conan API not initialized")
-
     try:
-        # Get Conan home folder
-        home_folder = conan_api.config.home()
-
-        # Load settings using load_settings_yml
-        settings_obj = load_settings_yml(home_folder)
-
-        # Get the settings path for the response
-        from conan.internal.cache.home_paths import HomePaths
-        home_paths = HomePaths(home_folder)
-        settings_path = home_paths.settings_path
-
-        # Extract settings structure from the loaded Settings object
-        possible_values = settings_obj.possible_values()
-
-        # Convert to ConanSettings format
-        conan_settings = ConanSettings(
-            path=settings_path,
-            os=possible_values.get("os", {}),
-            arch=list(possible_values.get("arch", [])),
-            compiler=possible_values.get("compiler", {}),
-            build_type=list(possible_values.get("build_type", []))
-        )
-
-        return conan_settings
+        # Reuse the cached settings unless settings files changed
+        mtimes = _settings_mtimes(home_paths)
+        etag = make_etag(mtimes)
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "max-age=60"})
+
+        cached = app.state.settings_cache
+        if cached is None or cached[0] != mtimes:
+            # Parsing settings.yml takes a while, keep the event loop free meanwhile
+            cached = (mtimes, await asyncio.to_thread(_load_conan_settings, home_folder, home_paths))
+            app.state.settings_cache = cached
+
+        response.headers["Cache-Control"] = "max-age=60"
+        response.headers["ETag"] = etag
+        return cached[1]
 
     except Exception as e:
         raise HTTPException(
@@ -131,18 +251,9 @@ async def get_settings_legacy():
 
 
 @app.get("/config/home")
-async def get_conan_home_legacy():
+async def get_conan_home_legacy(home_folder: str = Depends(get_home_folder)):
     """Get Conan home directory path."""
-    conan_api = get_conan_api()
-    if conan_api is None:
-        raise HTTPException(status_code=500, detail="Conan API not initialized")
-
-    try:
-        home_folder = conan_api.config.home()
-        return home_folder
-    except Exception as e:
-        raise HTTPException(
-            status_code=500, detail=f"Error getting Conan home: {str(e)}")
+    return home_folder
 
 
 if __name__ == "__main__":
@@ -151,21 +262,60 @@ if __name__ == "__main__":
     parser.add_argument("--host", default="127.0.0.1", help="Host to bind to")
     parser.add_argument("--port", type=int, default=0,
                         help="Port to bind to (0 for any available port)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes. Each worker owns its own Conan API "
+                             "instance and caches (default: 1)")
 
     args = parser.parse_args()
 
-    # If port is 0, let uvicorn choose an available port
-    if args.port == 0:
-        import socket
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.bind((args.host, 0))
-            actual_port = s.getsockname()[1]
+    # uvloop and httptools (pulled by uvicorn[standard]) are much faster than the
+    # pure python defaults, uvloop is not available on Windows though
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+    try:
+        import httptools  # noqa: F401
+        http = "httptools"
+    except ImportError:
+        http = "h11"
+
+    # The extension only talks to us over localhost: skip access logs and the
+    # Server/Date headers which are pure overhead on every response
+    server_options = dict(host=args.host, port=args.port, loop=loop, http=http,
+                          log_level="warning", access_log=False,
+                          server_header=False, date_header=False)
+
+    if args.workers > 1:
+        # uvicorn binds the port itself before forking the workers, pick a free one beforehand
+        if args.port == 0:
+            import socket
+            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+                s.bind((args.host, 0))
+                server_options["port"] = s.getsockname()[1]
+        actual_port = server_options["port"]
     else:
-        actual_port = args.port
+        # Bind the listening socket here and hand it over to uvicorn: with port 0 the OS picks
+        # a free port, which nobody else can take before the server listens on it
+        config = uvicorn.Config(app, **server_options)
+        sock = config.bind_socket()
+        actual_port = sock.getsockname()[1]
 
     # Output the port information for the extension to read
     print(f"CONAN_SERVER_PORT:{actual_port}", flush=True)
     print(
         f"Starting Conan API server on {args.host}:{actual_port}", flush=True)
 
-    uvicorn.run(app, host=args.host, port=actual_port, log_level="warning")
+    if args.workers > 1:
+        # Multiple workers require the application as an import string
+        uvicorn.run("conan_server:app", workers=args.workers,
+                    app_dir=os.path.dirname(os.path.abspath(__file__)), **server_options)
+    else:
+        server = uvicorn.Server(config)
+        try:
+            server.run(sockets=[sock])
+        except KeyboardInterrupt:
+            pass
+        if not server.started:
+            sys.exit(1)
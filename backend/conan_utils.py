@@ -3,20 +3,51 @@ Conan utility classes for VS Code extension.
 This module contains utility classes for Conan authentication and API management.
 """
 
+import asyncio
+import hashlib
+import logging
+import os
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+from fastapi import HTTPException
+from requests.adapters import HTTPAdapter
+
 try:
     from conan.api.conan_api import ConanAPI
     from conan.internal.conan_app import ConanBasicApp
     from conan.api.model import Remote
-    from conan.internal.errors import NotFoundException, ConanException
+    from conan.internal.cache.home_paths import HomePaths
+    from conan.internal.errors import (
+        NotFoundException, ConanException, AuthenticationException, ForbiddenException,
+        ConanConnectionError, RequestErrorException, InternalErrorException
+    )
 except ImportError:
     print("ERROR: Conan Python API not found. Make sure Conan 2.x is installed.")
     raise
 
+logger = logging.getLogger(__name__)
+
+
+# The Conan cache is not safe to write from several threads: the steps that may write to it
+# (graph loads downloading recipes, binaries analysis, export, install, test, upload) run one
+# at a time. The remote checks and the local cache lookups keep running concurrently
+cache_lock = asyncio.Lock()
+
 
-def is_authenticated(conan_api: ConanAPI, remote: Remote) -> bool:
+# Authentication only changes on login/logout, keep the result of the checks for a while
+AUTHENTICATION_TTL = 300.0
+_authentication_cache: Dict[Tuple[str, str], Tuple[float, bool]] = {}
+
+
+async def is_authenticated(conan_api: ConanAPI, remote: Remote) -> bool:
     """
     Convenience function to check if user is authenticated to a remote.
 
+    Results are cached per remote for AUTHENTICATION_TTL seconds. The check shares the per-host
+    concurrency limit and the rate limiting backoff of the remote checks, a check that fails
+    (e.g. remote unreachable, still rate limited) is reported as not authenticated but not cached.
+
     Args:
         conan_api: The ConanAPI instance
         remote: The remote to check (can be remote object or string name)
@@ -24,7 +55,21 @@ def is_authenticated(conan_api: ConanAPI, remote: Remote) -> bool:
     Returns:
         bool: True if authenticated, False otherwise
     """
+    key = (remote.name, remote.url)
+    cached = _authentication_cache.get(key)
+    if cached is not None and time.monotonic() - cached[0] < AUTHENTICATION_TTL:
+        return cached[1]
 
+    try:
+        authenticated = await _run_remote_check(remote, _check_authentication, conan_api)
+    except ConanException as e:
+        logger.warning("Error checking credentials of remote %s: %s", remote.name, e)
+        return False
+    _authentication_cache[key] = (time.monotonic(), authenticated)
+    return authenticated
+
+
+def _check_authentication(conan_api: ConanAPI, remote: Remote) -> bool:
     try:
         app = ConanBasicApp(conan_api)
         app.remote_manager.check_credentials(remote, False)
@@ -32,7 +77,275 @@ def is_authenticated(conan_api: ConanAPI, remote: Remote) -> bool:
     except NotFoundException:
         # 404 Looks like 404 means no authentication required (conancenter)
         return True
-    except ConanException as e:
-        # If exception occurs, assume not authenticated
-        print(f"Error checking credentials: {e}")
+    except (AuthenticationException, ForbiddenException) as e:
+        logger.debug("Not authenticated to remote %s: %s", remote.name, e)
         return False
+
+
+def clear_authentication_cache(remote_name: Optional[str] = None):
+    """
+    Forget the cached authentication checks (e.g. after a login).
+
+    Args:
+        remote_name: Only forget the checks of this remote, all of them if None
+    """
+    if remote_name is None:
+        _authentication_cache.clear()
+        return
+    for key in [key for key in _authentication_cache if key[0] == remote_name]:
+        del _authentication_cache[key]
+
+
+# Remote lookups results are kept for a short while: sibling subgraphs and back-to-back
+# refreshes from the editor keep probing the same references on the same remotes
+REMOTE_CHECKS_TTL = 60.0
+_remote_checks_cache: Dict[Tuple[str, ...], Tuple[float, "asyncio.Future[Any]"]] = {}
+_remote_checks_pruned_at = 0.0
+
+# Probes are fanned out for the whole graph at once, cap how many hit the same host
+REMOTE_HOST_CONCURRENCY = 16
+_host_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+
+def size_connection_pool(conan_api: ConanAPI):
+    """
+    Let the Conan HTTP session keep a connection per concurrent check to each remote host.
+
+    All the remote calls share the requests.Session of the Conan API, whose adapters only keep
+    10 connections per host by default: the connections of the checks beyond that are closed
+    once done, and the next checks pay for a new TCP/TLS handshake.
+    """
+    session = conan_api._api_helpers.requester._http_requester  # noqa
+    for prefix, adapter in list(session.adapters.items()):
+        session.mount(prefix, HTTPAdapter(pool_maxsize=REMOTE_HOST_CONCURRENCY,
+                                          max_retries=adapter.max_retries))
+
+
+# Remotes (Artifactory, conancenter) may throttle the fan-out, rate limited checks are
+# retried with an exponential backoff
+REMOTE_CHECK_RETRIES = 3
+REMOTE_CHECK_BACKOFF = 0.5
+REMOTE_CHECK_MAX_BACKOFF = 8.0
+
+
+class RateLimitedException(ConanException):
+    """A remote answered 429 Too Many Requests."""
+
+
+def _raise_when_rate_limited(response, *args, **kwargs):
+    # Conan reports a 429 as a generic request error whose message is the response body,
+    # raise a dedicated error instead (the remote manager lets ConanExceptions through)
+    if response.status_code == 429:
+        raise RateLimitedException(f"{response.status_code} {response.reason}: {response.url}")
+
+
+def detect_rate_limiting(conan_api: ConanAPI):
+    """Make the remote calls of the Conan API raise RateLimitedException when a remote throttles them."""
+    session = conan_api._api_helpers.requester._http_requester  # noqa
+    if _raise_when_rate_limited not in session.hooks["response"]:
+        session.hooks["response"].append(_raise_when_rate_limited)
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Tell whether an error raised while talking to a remote means it is throttling us."""
+    return isinstance(error, RateLimitedException)
+
+
+# Seconds a client should wait before retrying when a remote is throttling us or unreachable
+RETRY_AFTER = 5
+
+
+def conan_error_to_http(error: Exception, message: str) -> HTTPException:
+    """
+    Map an error raised by the Conan API to the matching HTTP error.
+
+    Args:
+        error: The error raised while calling Conan
+        message: Context of the error, prefixed to the error detail
+
+    Returns:
+        The HTTPException to raise, errors that are not specific to a remote map to 500
+    """
+    if isinstance(error, HTTPException):
+        return error
+
+    detail = f"{message}: {str(error)}"
+    retry_after = {"Retry-After": str(RETRY_AFTER)}
+    if isinstance(error, ConanConnectionError):
+        return HTTPException(status_code=503, detail=detail, headers=retry_after)
+    if isinstance(error, NotFoundException):
+        return HTTPException(status_code=404, detail=detail)
+    if isinstance(error, AuthenticationException):
+        return HTTPException(status_code=401, detail=detail)
+    if isinstance(error, ForbiddenException):
+        return HTTPException(status_code=403, detail=detail)
+    if isinstance(error, (RequestErrorException, InternalErrorException)):
+        return HTTPException(status_code=502, detail=detail)
+    if is_rate_limited(error):
+        return HTTPException(status_code=429, detail=detail, headers=retry_after)
+    return HTTPException(status_code=500, detail=detail)
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Build an HTTP entity tag from what a response is derived from (e.g. file modification times).
+
+    Args:
+        *parts: Values identifying the content of the response, must have a stable repr
+
+    Returns:
+        The quoted entity tag
+    """
+    return '"' + hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest() + '"'
+
+
+async def _run_remote_check(remote: Remote, check: Callable[..., Any], *args) -> Any:
+    host = urlparse(remote.url).netloc or remote.name
+    semaphore = _host_semaphores.get(host)
+    if semaphore is None:
+        semaphore = _host_semaphores[host] = asyncio.Semaphore(REMOTE_HOST_CONCURRENCY)
+
+    for attempt in range(REMOTE_CHECK_RETRIES + 1):
+        try:
+            async with semaphore:
+                return await asyncio.to_thread(check, *args, remote)
+        except Exception as e:
+            # The checks handle their errors, only rate limiting ones are let through
+            if not is_rate_limited(e):
+                raise
+            if attempt == REMOTE_CHECK_RETRIES:
+                logger.warning("Giving up checking remote %s, still rate limited: %s", remote.name, e)
+                raise
+            # Back off outside of the semaphore so other hosts and checks are not held
+            await asyncio.sleep(min(REMOTE_CHECK_MAX_BACKOFF, REMOTE_CHECK_BACKOFF * 2 ** attempt))
+
+
+def _prune_remote_checks(now: float):
+    """Drop the expired remote checks, at most once per REMOTE_CHECKS_TTL."""
+    global _remote_checks_pruned_at
+    if now - _remote_checks_pruned_at < REMOTE_CHECKS_TTL:
+        return
+    _remote_checks_pruned_at = now
+    for key, (created, future) in list(_remote_checks_cache.items()):
+        if now - created >= REMOTE_CHECKS_TTL and future.done():
+            del _remote_checks_cache[key]
+
+
+def _forget_failed_check(key: Tuple[str, ...], future: "asyncio.Future[Any]"):
+    # A failed check (e.g. still rate limited, unreachable) tells nothing about the remote, run it again next time
+    if future.cancelled() or future.exception() is not None:
+        cached = _remote_checks_cache.get(key)
+        if cached is not None and cached[1] is future:
+            del _remote_checks_cache[key]
+
+
+async def cached_remote_check(remote: Remote, key: Tuple[str, ...], check: Callable[..., Any], *args) -> Any:
+    """
+    Run a blocking remote check in a worker thread, caching its result for REMOTE_CHECKS_TTL seconds.
+
+    Concurrent callers asking for the same key share the same in-flight call, and at most
+    REMOTE_HOST_CONCURRENCY checks run at once against the same remote host. Checks raising
+    an error (e.g. RateLimitedException once the retries are exhausted, ConanConnectionError)
+    are not cached.
+
+    Args:
+        remote: The remote to check, passed as last argument to the check function
+        key: The cache key within the remote, usually (reference, kind of check)
+        check: The blocking function performing the check
+        *args: Arguments forwarded to the check function
+
+    Returns:
+        The (possibly cached) result of the check
+    """
+    # A remote renamed or pointed to another URL must not reuse the results of the previous one
+    key = (remote.name, remote.url, *key)
+    now = time.monotonic()
+    cached = _remote_checks_cache.get(key)
+    if cached is not None and now - cached[0] < REMOTE_CHECKS_TTL:
+        future = cached[1]
+    else:
+        _prune_remote_checks(now)
+        future = asyncio.ensure_future(_run_remote_check(remote, check, *args))
+        _remote_checks_cache[key] = (now, future)
+        future.add_done_callback(lambda done: _forget_failed_check(key, done))
+
+    if future.done():
+        return future.result()
+    # Shield the shared call so a cancelled caller does not cancel it for the others
+    return await asyncio.shield(future)
+
+
+def clear_remote_checks_cache(remote_name: Optional[str] = None):
+    """
+    Forget the cached remote checks (e.g. after the remotes configuration changed).
+
+    Args:
+        remote_name: Only forget the checks of this remote (e.g. after uploading to it), all of them if None
+    """
+    if remote_name is None:
+        _remote_checks_cache.clear()
+        _host_semaphores.clear()
+        return
+    for key in [key for key in _remote_checks_cache if key[0] == remote_name]:
+        del _remote_checks_cache[key]
+
+
+# The remotes configuration (remotes.json) rarely changes, it is only read again when the file
+# modification time changes (edits from the command line included), the routes editing it also
+# clear the cache
+_remotes_list_cache: Dict[str, Tuple[Optional[int], List[Remote]]] = {}
+_remotes_cache: Dict[str, Tuple[Optional[int], Remote]] = {}
+
+
+def _remotes_mtime(conan_api: ConanAPI) -> Optional[int]:
+    """Modification time of remotes.json (None when missing, Conan then uses its default remotes)."""
+    try:
+        return os.stat(HomePaths(conan_api.config.home()).remotes_path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def cached_remotes_list(conan_api: ConanAPI) -> List[Remote]:
+    """
+    Get the enabled remotes, cached until remotes.json changes.
+
+    Args:
+        conan_api: The ConanAPI instance
+
+    Returns:
+        List[Remote]: A new list of the enabled remotes, callers are free to modify it
+    """
+    mtime = _remotes_mtime(conan_api)
+    cached = _remotes_list_cache.get("enabled")
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, conan_api.remotes.list())
+        _remotes_list_cache["enabled"] = cached
+    return list(cached[1])
+
+
+def cached_remotes_get(conan_api: ConanAPI, name: str) -> Remote:
+    """
+    Get a remote by name, cached until remotes.json changes.
+
+    Args:
+        conan_api: The ConanAPI instance
+        name: The name of the remote
+
+    Returns:
+        Remote: The remote
+
+    Raises:
+        ConanException: If the remote does not exist
+    """
+    mtime = _remotes_mtime(conan_api)
+    cached = _remotes_cache.get(name)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, conan_api.remotes.get(name))
+        _remotes_cache[name] = cached
+    return cached[1]
+
+
+def clear_remotes_cache():
+    """Forget the cached remotes (e.g. after a remote was added or removed)."""
+    _remotes_list_cache.clear()
+    _remotes_cache.clear()
@@ -1,53 +1,184 @@
+import functools
 import os
 import sys
-from typing import Optional
-from fastapi import HTTPException
+from typing import Optional, Tuple
+from fastapi import HTTPException, Request
 
 try:
     from conan.api.conan_api import ConanAPI
+    from conan.internal.model.profile import Profile
+    from conan.internal.cache.home_paths import HomePaths
+    from conan.internal.util.files import load_user_encoded
 except ImportError:
     print("ERROR: Conan Python API not found. Make sure Conan 2.x is installed.")
     sys.exit(1)
 
-# Global variable for ConanAPI instance
-conan_api: Optional[ConanAPI] = None
+def get_conan_api(request: Request) -> ConanAPI:
+    """Get the ConanAPI instance created at startup."""
+    conan_api = getattr(request.app.state, "conan_api", None)
+    if conan_api is None:
+        raise HTTPException(
+            status_code=500, detail="Conan API not initialized")
+    return conan_api
 
 
-def get_conan_api() -> ConanAPI:
-    """Get the global ConanAPI instance."""
-    global conan_api
-    if not conan_api:
+def get_home_folder(request: Request) -> str:
+    """Get the Conan home folder, resolved once at startup."""
+    home_folder = getattr(request.app.state, "home_folder", None)
+    if home_folder is None:
         raise HTTPException(
             status_code=500, detail="Conan API not initialized")
-    return conan_api
+    return home_folder
+
+
+def get_home_paths(request: Request) -> HomePaths:
+    """Get the HomePaths of the Conan home folder, resolved once at startup."""
+    home_paths = getattr(request.app.state, "home_paths", None)
+    if home_paths is None:
+        raise HTTPException(
+            status_code=500, detail="Conan API not initialized")
+    return home_paths
+
+
+def get_profile(conan_api: ConanAPI, profile_name: str) -> Profile:
+    """
+    Load a Conan profile by name or path.
+
+    Loaded profiles are cached until the modification time of their file, or of a profile they
+    include, changes. Profiles using jinja templates are always loaded again: what they depend
+    on (other files, environment variables...) is only known once rendered.
+
+    Args:
+        conan_api: The ConanAPI instance
+        profile_name: Name (or path) of the profile to load
+
+    Returns:
+        The loaded profile
+    """
+    profile_path = conan_api.profiles.get_path(profile_name)
+    files, complete = profile_files(conan_api, profile_path)
+    if not complete:
+        return conan_api.profiles.get_profile([profile_path], {}, {}, {}, None)
+    return _get_profile(conan_api, profile_path, files)
 
 
-def set_conan_api(api: ConanAPI):
-    """Set the global ConanAPI instance."""
-    global conan_api
-    conan_api = api
+@functools.lru_cache(maxsize=64)
+def _get_profile(conan_api: ConanAPI, profile_path: str, files: Tuple[Tuple[str, int], ...]) -> Profile:
+    """Load a profile, files is only used as part of the cache key."""
+    return conan_api.profiles.get_profile([profile_path], {}, {}, {}, None)
+
+
+def profile_files(conan_api: ConanAPI, profile_path: str) -> Tuple[Tuple[Tuple[str, int], ...], bool]:
+    """
+    List the files loaded by a profile: its own file and the profiles it includes.
+
+    Args:
+        conan_api: The ConanAPI instance
+        profile_path: Path of the profile file
+
+    Returns:
+        The (path, modification time) of the files, and whether they are all the profile depends
+        on (False when a jinja template or an include that cannot be resolved is found)
+    """
+    files = []
+    complete = True
+    pending = [profile_path]
+    while pending:
+        path = pending.pop()
+        if any(path == known for known, _ in files):
+            continue
+        mtime_ns = os.stat(path).st_mtime_ns
+        files.append((path, mtime_ns))
+
+        includes = _profile_includes(path, mtime_ns)
+        if includes is None:
+            complete = False
+            continue
+        for include in includes:
+            try:
+                # Includes are relative to the including profile, like Conan resolves them
+                pending.append(conan_api.profiles.get_path(include, cwd=os.path.dirname(path)))
+            except Exception:
+                # Loading the profile reports it
+                complete = False
+    return tuple(files), complete
+
+
+@functools.lru_cache(maxsize=128)
+def _profile_includes(profile_path: str, mtime_ns: int) -> Optional[Tuple[str, ...]]:
+    """Profiles included by a profile file, None for jinja templates. mtime_ns is only used as part of the cache key."""
+    text = load_user_encoded(profile_path)
+    if "{{" in text or "{%" in text or "{#" in text:
+        return None
+
+    # Same parsing as Conan, the includes come before the first section
+    includes = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("["):
+            break
+        if line.startswith("include(") and line.endswith(")"):
+            includes.append(line[len("include("):-1])
+    return tuple(includes)
+
+
+def clear_profile_cache():
+    """Forget all the cached profiles."""
+    _get_profile.cache_clear()
+    _profile_includes.cache_clear()
 
 
 def find_conanfile(workspace_path: str) -> str:
     """
     Find conanfile in the specified workspace directory.
 
+    Results are cached per workspace and invalidated whenever the workspace
+    directory modification time changes (i.e. a file is added, removed or renamed).
+
     Args:
         workspace_path: Path to the workspace directory.
 
     Returns:
-        Path to the found conanfile (conanfile.txt or conanfile.py)
+        Path to the found conanfile (conanfile.py, or else conanfile.txt)
 
     Raises:
         HTTPException: If no conanfile is found
     """
-    conanfile_txt = os.path.join(workspace_path, "conanfile.txt")
-    conanfile_py = os.path.join(workspace_path, "conanfile.py")
-
-    if os.path.exists(conanfile_txt):
-        return os.path.abspath(conanfile_txt)
-    elif os.path.exists(conanfile_py):
-        return os.path.abspath(conanfile_py)
-    else:
+    try:
+        mtime_ns = os.stat(workspace_path).st_mtime_ns
+    except OSError:
+        mtime_ns = None
+
+    conanfile_path = None
+    if mtime_ns is not None:
+        conanfile_path = _find_conanfile(
+            os.path.abspath(workspace_path), mtime_ns)
+
+    if conanfile_path is None:
         raise HTTPException(
             status_code=404, detail=f"No conanfile found in workspace directory: {workspace_path}")
+    return conanfile_path
+
+
+@functools.lru_cache(maxsize=128)
+def _find_conanfile(workspace_path: str, mtime_ns: int) -> Optional[str]:
+    """Look up the conanfile of a workspace, mtime_ns is only used as part of the cache key."""
+    # A single directory read instead of one stat per candidate
+    try:
+        with os.scandir(workspace_path) as entries:
+            file_names = {entry.name for entry in entries if entry.is_file()}
+    except OSError:
+        return None
+
+    # When both exist, conanfile.py wins like the extension's default preferredConanfileFormat
+    for conanfile_name in ("conanfile.py", "conanfile.txt"):
+        if conanfile_name in file_names:
+            return os.path.join(workspace_path, conanfile_name)
+    return None
+
+
+def clear_find_conanfile_cache():
+    """Forget all the cached conanfile locations."""
+    _find_conanfile.cache_clear()
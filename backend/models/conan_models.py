@@ -1,26 +1,33 @@
-from typing import List, Optional, Dict
-from pydantic import BaseModel
+from typing import List, Optional, Dict, Tuple
+from pydantic import BaseModel, ConfigDict
 
 class ConanSettings(BaseModel):
     """Conan settings structure."""
+
+    model_config = ConfigDict(frozen=True)
+
     path: str                           # Path to settings file in home folder
 
     os: Dict[str, dict] = {}            # e.g., {"Windows": {}, "Linux": {}}
-    arch: List[str] = []                # e.g., ["x86_64", "armv8"]
+    arch: Tuple[str, ...] = ()          # e.g., ("x86_64", "armv8")
 
     # e.g., {"gcc": {"version": ["9", "10"], "libcxx": ["libstdc++11"]}, "clang": {...}}
     compiler: Dict[str, dict] = {}
-    build_type: List[str | None] = []   # e.g., ["Debug", "Release"]
+    build_type: Tuple[str | None, ...] = ()  # e.g., ("Debug", "Release")
 
 class PackageLocalStatus(BaseModel):
     """Package availability status in the cache."""
 
+    model_config = ConfigDict(frozen=True)
+
     recipe_status: str
     binary_status: str
 
 class PackageRemoteStatus(BaseModel):
     """Package availability status on a specific remote."""
 
+    model_config = ConfigDict(frozen=True)
+
     remote_name: str
     recipe_status: str
     binary_status: str
@@ -28,6 +35,8 @@ class PackageRemoteStatus(BaseModel):
 class PackageAvailability(BaseModel):
     """Package availability information based on what Conan's analyze_binaries tells us."""
 
+    model_config = ConfigDict(frozen=True)
+
     is_incompatible: bool = False
     incompatible_reason: Optional[str] = None
 
@@ -50,6 +59,8 @@ class ConanRecipe(BaseModel):
 
 
 class ConanPackage(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     name: str
     version: str
     ref: str
@@ -59,13 +70,42 @@ class ConanPackage(BaseModel):
     dependencies: List['ConanPackage'] = []
 
 
+class ConanGraphPackage(BaseModel):
+    """Package of a ConanRecipeGraph, dependencies are keys of ConanRecipeGraph.packages."""
+
+    model_config = ConfigDict(frozen=True)
+
+    name: str
+    version: str
+    ref: str
+    id: str
+    availability: PackageAvailability
+    dependencies: List[str] = []
+
+
+class ConanRecipeGraph(BaseModel):
+    """ConanRecipe where every package is listed once, keyed by "<ref>:<id>"."""
+    name: str
+    version: str
+    ref: str
+    id: str
+    type: str  # "producer" or "consumer"
+    error: Optional[str] = None
+    dependencies: List[str] = []
+    packages: Dict[str, ConanGraphPackage] = {}
+
+
 class ConanProfile(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     name: str
     path: str
     isLocal: bool = False
 
 
 class ConanRemote(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     name: str
     url: str
     verify_ssl: bool = True
@@ -100,6 +140,12 @@ class InstallResponse(BaseModel):
     message: str
     status: str
 
+class PackagesTaskResponse(BaseModel):
+    task_id: str
+    status: str  # "running", "done" or "error"
+    result: Optional[ConanRecipe] = None
+    error: Optional[str] = None
+
 class InstallPackageRequest(BaseModel):
     workspace_path: str
     package_ref: str
@@ -1,7 +1,8 @@
 from typing import Optional
 from pydantic import BaseModel
-from fastapi import APIRouter, HTTPException
-from dependencies.conan_deps import get_conan_api
+from fastapi import APIRouter, Depends, HTTPException
+from conan.api.conan_api import ConanAPI
+from dependencies.conan_deps import get_conan_api, clear_find_conanfile_cache
 
 router = APIRouter(prefix="/new", tags=["new"])
 
@@ -11,15 +12,11 @@ class CreateProjectRequest(BaseModel):
     name: Optional[str] = None
 
 @router.post('')
-def create_new_project(request: CreateProjectRequest):
+def create_new_project(request: CreateProjectRequest, conan_api: ConanAPI = Depends(get_conan_api)):
     """Create a new Conan project with specified template"""
     try:
-        conan_api = get_conan_api()
-        if conan_api is None:
-            raise HTTPException(
-                status_code=500, detail="Conan API not initialized")
-
         conan_api.new.save_template(request.template, [f"name={request.name}"], request.workspace_path)
+        clear_find_conanfile_cache()
         
         return {
             "message": f"Project {request.name} created at {request.workspace_path} using template {request.template}",
@@ -1,13 +1,22 @@
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException
+import asyncio
+import logging
+import os
+import time
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional, Tuple, Union
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import StreamingResponse
 import sys
 
 from models.conan_models import (
-    ConanPackage, ConanRecipe, InstallResponse, PackageAvailability, PackageRemoteStatus, PackageLocalStatus,
-    InstallRequest, InstallPackageRequest, UploadLocalRequest
+    ConanPackage, ConanRecipe, ConanGraphPackage, ConanRecipeGraph, InstallResponse, PackageAvailability, PackageRemoteStatus, PackageLocalStatus,
+    InstallRequest, InstallPackageRequest, UploadLocalRequest, PackagesTaskResponse
+)
+from dependencies.conan_deps import get_conan_api, find_conanfile, get_profile, profile_files
+from conan_utils import (
+    is_authenticated, is_rate_limited, cached_remote_check, cached_remotes_list, cached_remotes_get, cache_lock,
+    conan_error_to_http, clear_remote_checks_cache
 )
-from dependencies.conan_deps import get_conan_api, find_conanfile
-from conan_utils import is_authenticated
 
 try:
     from conan.api.model import RecipeReference, PkgReference, Remote
@@ -15,22 +24,38 @@ try:
     from conan.api.model import ListPattern
     from conan.internal.model.profile import Profile
     from conan.errors import ConanException
+    from conan.internal.errors import NotFoundException
     from conan.internal.graph.graph_builder import DepsGraphBuilder
     from conan.internal.model.options import Options
-    from conan.errors import ConanInvalidConfiguration
     from conan.internal.graph.graph import Node
     from conan.internal.graph.graph_error import GraphMissingError, GraphConflictError
-    from conan.internal.graph.graph import BINARY_BUILD, BINARY_CACHE, BINARY_DOWNLOAD, BINARY_INVALID
-    from conan.internal.graph.graph import RECIPE_DOWNLOADED, RECIPE_INCACHE, RECIPE_UPDATED, RECIPE_CONSUMER
+    from conan.internal.graph.graph import BINARY_INVALID
 except ImportError:
     print("ERROR: Conan Python API not found. Make sure Conan 2.x is installed.")
     sys.exit(1)
 
 router = APIRouter(prefix="/packages", tags=["packages"])
 
+logger = logging.getLogger(__name__)
+
+# Update policy matching every reference, Conan only iterates over it
+_UPDATE_ALL = ("*",)
+
+# Per-request memo of the package tree resolution, holds the pending node resolutions
+# and local cache probes so that shared dependencies are only looked up once
+PackagesMemo = Dict[Tuple[Optional[str], ...], asyncio.Future]
+
+# Background /packages computations are forgotten once fetched or after this delay
+PACKAGES_TASK_TTL = 600.0
+
+# Package tree computations in progress, identical requests arriving meanwhile (the extension
+# refreshes on save, focus...) wait for the same computation instead of starting another one
+_packages_inflight: Dict[Tuple[Any, ...], asyncio.Future] = {}
 
-def is_recipe_available(conan_api: ConanAPI, ref: RecipeReference, remote: Optional[Remote] = None) -> bool:
-    """Check if a recipe is available in any of the specified remotes.
+
+def get_latest_recipe_revision(conan_api: ConanAPI, ref: RecipeReference,
+                               remote: Optional[Remote] = None) -> Optional[RecipeReference]:
+    """Get the latest revision of a recipe, which also tells whether the recipe is available.
 
     Args:
         conan_api (ConanAPI): The Conan API instance.
@@ -38,73 +63,156 @@ def is_recipe_available(conan_api: ConanAPI, ref: RecipeReference, remote: Optio
         remote (Optional[Remote]): The remote to check. If None, checks local cache.
 
     Returns:
-        bool: True if the recipe is available, False otherwise.
+        Optional[RecipeReference]: The latest recipe revision, None if the recipe is not available.
+
+    Raises:
+        Exception: When checking a remote fails for another reason than the recipe missing.
     """
     try:
-        # Create a new recipe that won't have any revision
-        recipe_ref: RecipeReference = RecipeReference(
-            ref.name,
-            ref.version,
-            ref.user,
-            ref.channel
-        )
-        recipe_revisions = conan_api.list.recipe_revisions(recipe_ref, remote)
-        if recipe_revisions:
-            return True
+        # Create a new recipe that won't have any revision (unless it is already the case)
+        recipe_ref: RecipeReference = ref
+        if ref.revision is not None:
+            recipe_ref = RecipeReference(
+                ref.name,
+                ref.version,
+                ref.user,
+                ref.channel
+            )
+        return conan_api.list.latest_recipe_revision(recipe_ref, remote)
+    except NotFoundException as e:
+        # A missing recipe is the expected outcome of most probes
+        logger.debug("Recipe %s not found on %s: %s", ref, remote.name if remote else "local cache", e)
     except Exception as e:
-        print(
-            f"Error checking remote availability for recipe {ref} on {remote.name}: {e}")
-    return False
+        # A failing remote (throttling, unreachable...) tells nothing about the recipe, let the caller know
+        if remote is not None:
+            raise
+        logger.warning("Error checking availability for recipe %s on local cache: %s", ref, e)
+    return None
 
 
-def is_package_available(conan_api: ConanAPI, ref: RecipeReference, package_id: str, remote: Optional[Remote] = None) -> bool:
-    """Check if a package is available in any of the specified remotes.
+def is_package_ref_available(conan_api: ConanAPI, package_ref: PkgReference, remote: Optional[Remote] = None) -> bool:
+    """Check if a package with a known recipe revision is available.
 
     Args:
         conan_api (ConanAPI): The Conan API instance.
-        ref (RecipeReference): The recipe reference.
-        package_id (str): The package ID.
+        package_ref (PkgReference): The package reference, its recipe reference has a revision.
         remote (Optional[Remote]): The remote to check. If None, checks local cache.
 
     Returns:
         bool: True if the package is available, False otherwise.
+
+    Raises:
+        Exception: When checking a remote fails for another reason than the package missing.
     """
-    # Check if binary exists for this package ID
     try:
-        recipe_ref = ref
-        if not recipe_ref.revision:
-            recipe_ref = conan_api.list.latest_recipe_revision(
-                recipe_ref, remote)
-        package_ref: PkgReference = PkgReference(
-            recipe_ref, package_id)
         package_revisions = conan_api.list.package_revisions(
             package_ref, remote)
         if package_revisions:
             return True
+    except NotFoundException as e:
+        logger.debug("Package %s not found on %s: %s",
+                     package_ref.package_id, remote.name if remote else "local cache", e)
     except Exception as e:
-        print(
-            f"Error checking remote availability for package {package_id}: {e}")
+        if remote is not None:
+            raise
+        logger.warning("Error checking availability for package %s on local cache: %s", package_ref.package_id, e)
     return False
 
 
-def create_package_from_node(conan_api: ConanAPI, node: Node, remotes: List[Remote], profile_host: Profile) -> List[ConanPackage]:
-
-    dependencies: List[ConanPackage] = []
-    for edge in node.edges:
-        dependencies.extend(create_package_from_node(
-            conan_api, edge.dst, remotes, profile_host=profile_host))
-
-    # If this node is not a package (e.g. conanfile.txt / cli) return directly the dependencies
-    if node.ref is None:
-        return dependencies
-
-    # Extract what Conan tells us
-    recipe_status = str(
-        node.recipe) if node.recipe else "unknown"
-    binary_status = str(
-        node.binary) if node.binary else "unknown"
-
-    is_incompatible = binary_status == BINARY_INVALID
+async def _check_latest_package(conan_api: ConanAPI, recipe_check: Awaitable[Optional[RecipeReference]],
+                                package_id: str, remote: Optional[Remote] = None) -> bool:
+    """Check if a package is available in the latest recipe revision found by recipe_check."""
+    latest_ref = await recipe_check
+    if latest_ref is None:
+        return False
+    package_ref = PkgReference(latest_ref, package_id)
+    if remote is None:
+        return await asyncio.to_thread(is_package_ref_available, conan_api, package_ref)
+    return await cached_remote_check(remote, (f"{latest_ref.repr_notime()}:{package_id}", "package"),
+                                     is_package_ref_available, conan_api, package_ref)
+
+
+def _memoized(memo: PackagesMemo, key: Tuple[Optional[str], ...], make: Callable[[], Awaitable]) -> asyncio.Future:
+    """Get the memoized future of key, scheduling make() the first time it is asked for."""
+    future = memo.get(key)
+    if future is None:
+        future = memo[key] = asyncio.ensure_future(make())
+    return future
+
+
+def _post_order(root: Node) -> List[Node]:
+    """List the nodes reachable from root (included), each node after all its dependencies."""
+    order: List[Node] = []
+    visited = {id(root)}
+    stack = [(root, iter(root.edges))]
+    while stack:
+        node, edges = stack[-1]
+        for edge in edges:
+            if id(edge.dst) not in visited:
+                visited.add(id(edge.dst))
+                stack.append((edge.dst, iter(edge.dst.edges)))
+                break
+        else:
+            stack.pop()
+            order.append(node)
+    return order
+
+
+async def create_package_from_node(conan_api: ConanAPI, node: Node, remotes: List[Remote], profile_host: Profile,
+                                   memo: Optional[PackagesMemo] = None,
+                                   check_remotes_when_cached: bool = True) -> List[ConanPackage]:
+    """Build the package tree of a graph node, probing the local cache and remotes.
+
+    The graph is walked iteratively, all its packages are probed at once and the tree is then
+    assembled bottom-up. A package reachable through several parents (diamond dependencies) is
+    only probed once per memo, which can be shared by the graphs of a same request.
+    Unless check_remotes_when_cached, the remotes are not probed for packages fully in the cache.
+    """
+    if memo is None:
+        memo = {}
+
+    order = _post_order(node)
+
+    # The package id alone is not unique (e.g. every header-only package shares it)
+    package_nodes = [current for current in order if current.ref is not None]
+    availabilities = await asyncio.gather(*[
+        _memoized(memo, ("availability", str(current.ref), current.package_id),
+                  lambda current=current: _get_package_availability(conan_api, current, remotes, memo,
+                                                                     check_remotes_when_cached))
+        for current in package_nodes])
+    availability_of = {id(current): availability for current,
+                       availability in zip(package_nodes, availabilities)}
+
+    # Dependencies come first in the post-order, their packages are always built already
+    built: Dict[int, List[ConanPackage]] = {}
+    for current in order:
+        dependencies: List[ConanPackage] = [
+            package for edge in current.edges for package in built[id(edge.dst)]]
+
+        # If this node is not a package (e.g. conanfile.txt / cli) return directly the dependencies
+        ref = current.ref
+        if ref is None:
+            built[id(current)] = dependencies
+            continue
+
+        version, package_id = ref.version, current.package_id
+        built[id(current)] = [ConanPackage.model_construct(
+            name=ref.name,
+            version=str(version) if version else "none",
+            ref=str(ref),
+            id=package_id if package_id else "none",
+            dependencies=dependencies,
+            availability=availability_of[id(current)]
+        )]
+
+    return built[id(node)]
+
+
+async def _get_package_availability(conan_api: ConanAPI, node: Node, remotes: List[Remote],
+                                    memo: PackagesMemo, check_remotes_when_cached: bool = True) -> PackageAvailability:
+    """Probe the local cache and the remotes for the recipe and binary of a package node."""
+    # Extract what Conan tells us, the binary statuses are plain string constants
+    is_incompatible = node.binary == BINARY_INVALID
     incompatible_reason = node.conanfile.info.invalid if is_incompatible else None
 
     remotes_status: List[PackageRemoteStatus] = []
@@ -112,188 +220,363 @@ def create_package_from_node(conan_api: ConanAPI, node: Node, remotes: List[Remo
     try:
         local_recipe_status = "none"
         local_binary_status = "none"
-        if is_recipe_available(conan_api, node.ref):
+
+        # Probe the local cache and every remote at once, each check is a blocking
+        # (and for remotes network bound) call so run them in worker threads
+        # Remote lookups are cached for a short while, the local cache is checked once per request
+        recipe_key = str(node.ref)
+        package_key = f"{node.ref.repr_notime()}:{node.package_id}"
+
+        # The references are the same for every location, build them once
+        recipe_ref = RecipeReference(node.ref.name, node.ref.version, node.ref.user, node.ref.channel)
+        package_ref = PkgReference(node.ref, node.package_id) if node.ref.revision else None
+
+        # The recipe checks return the latest revision (or None when the recipe is missing)
+        local_recipe_check = _memoized(memo, ("local", recipe_key, "recipe"),
+                                       lambda: asyncio.to_thread(get_latest_recipe_revision, conan_api, recipe_ref))
+        if package_ref is not None:
+            local_package_check = _memoized(memo, ("local", package_key, "package"),
+                                            lambda: asyncio.to_thread(is_package_ref_available, conan_api, package_ref))
+        else:
+            # No revision to look the binary up in, reuse the latest one found by the recipe
+            # check of each location instead of asking for it again
+            local_package_check = asyncio.ensure_future(
+                _check_latest_package(conan_api, local_recipe_check, node.package_id, None))
+
+        # Only ask the remotes about what the local cache misses when told so
+        unchecked_remotes: List[Remote] = []
+        if not check_remotes_when_cached and all(await asyncio.gather(local_recipe_check, local_package_check)):
+            unchecked_remotes, remotes = remotes, []
+
+        locations: List[Optional[Remote]] = [None, *remotes]
+        recipe_checks = [
+            local_recipe_check,
+            *[asyncio.ensure_future(cached_remote_check(remote, (recipe_key, "recipe"),
+                                                        get_latest_recipe_revision, conan_api, recipe_ref))
+              for remote in remotes]]
+
+        if package_ref is not None:
+            package_checks = [
+                local_package_check,
+                *[cached_remote_check(remote, (package_key, "package"),
+                                      is_package_ref_available, conan_api, package_ref)
+                  for remote in remotes]]
+        else:
+            package_checks = [
+                local_package_check,
+                *[_check_latest_package(conan_api, recipe_check, node.package_id, remote)
+                  for recipe_check, remote in zip(recipe_checks[1:], remotes)]]
+
+        # A failed remote check (e.g. the remote kept throttling us) leaves its status unknown
+        checks = await asyncio.gather(*recipe_checks, *package_checks, return_exceptions=True)
+        recipes_available = checks[:len(locations)]
+        packages_available = checks[len(locations):]
+
+        if recipes_available[0]:
             local_recipe_status = "cache"
-        if is_package_available(
-                conan_api, node.ref, node.package_id):
+        if packages_available[0]:
             local_binary_status = "cache"
 
         # Check each configured remote
-        for remote in remotes:
+        for remote, remote_recipe_available, remote_binary_available in zip(
+                remotes, recipes_available[1:], packages_available[1:]):
 
             # Enhanced remote checking: if package is in local cache, also check remote availability
             remote_recipe_status = "none"
             remote_binary_status = "none"
 
-            remote_recipe_available = is_recipe_available(
-                conan_api, node.ref, remote)
-
-            remote_binary_available = is_package_available(
-                conan_api, node.ref, node.package_id, remote)
+            # Giving up on a rate limited check is already reported by cached_remote_check
+            for error in {result for result in (remote_recipe_available, remote_binary_available)
+                          if isinstance(result, BaseException) and not is_rate_limited(result)}:
+                logger.warning("Error checking availability for %s on %s: %s", node.ref, remote.name, error)
 
-            if remote_recipe_available:
+            if isinstance(remote_recipe_available, BaseException):
+                remote_recipe_status = "unknown"
+            elif remote_recipe_available:
                 remote_recipe_status = "available"
-            if remote_binary_available:
+            if isinstance(remote_binary_available, BaseException):
+                remote_binary_status = "unknown"
+            elif remote_binary_available:
                 remote_binary_status = "available"
 
-            remotes_status.append(PackageRemoteStatus(
+            remotes_status.append(PackageRemoteStatus.model_construct(
                 remote_name=remote.name,
                 recipe_status=remote_recipe_status,
                 binary_status=remote_binary_status
             ))
 
+        remotes_status.extend(PackageRemoteStatus.model_construct(
+            remote_name=remote.name,
+            recipe_status="unknown",
+            binary_status="unknown"
+        ) for remote in unchecked_remotes)
+
     except Exception as e:
-        print(
-            f"Error checking remote availability for {node.ref}: {e}")
+        logger.warning("Error checking remote availability for %s: %s", node.ref, e)
 
-    availability = PackageAvailability(
+    return PackageAvailability.model_construct(
         is_incompatible=is_incompatible,
         incompatible_reason=incompatible_reason,
-        local_status=PackageLocalStatus(
+        local_status=PackageLocalStatus.model_construct(
             recipe_status=local_recipe_status,
             binary_status=local_binary_status
         ),
         remotes_status=remotes_status
     )
 
-    package = ConanPackage(
-        name=node.ref.name,
-        version=str(node.ref.version) if node.ref.version else "none",
-        ref=str(node.ref),
-        id=node.package_id if node.package_id else "none",
-        dependencies=dependencies,
-        availability=availability
-    )
 
-    return [package]
+async def _resolved(packages: List[ConanPackage]) -> List[ConanPackage]:
+    return packages
 
 
-async def parse_conanfile(conan_api: ConanAPI, file_path: str, host_profile: str, build_profile: str, remote_name: Optional[str] = None) -> ConanRecipe:
-    """Parse conanfile.py and extract packages with optional remote filtering."""
+async def _resolve_conanfile(conan_api: ConanAPI, file_path: str, host_profile: str, build_profile: str,
+                             remote_name: Optional[str] = None, check_remotes_when_cached: bool = True
+                             ) -> Tuple[ConanRecipe, List[Awaitable[List[ConanPackage]]]]:
+    """
+    Load and analyze the dependency graph of a conanfile.
+
+    Returns:
+        The recipe, without dependencies, and for each of its requirements (in order) the
+        pending resolution of its packages availability
+    """
 
     # Load the specified profiles
-    profile_host = conan_api.profiles.get_profile(
-        [host_profile], {}, {}, {}, None)
-    profile_build = conan_api.profiles.get_profile(
-        [build_profile], {}, {}, {}, None)
+    profile_host = await asyncio.to_thread(
+        get_profile, conan_api, host_profile)
+    profile_build = await asyncio.to_thread(
+        get_profile, conan_api, build_profile)
 
     # Set up remotes to check
     remotes: List[Remote] = []
     if not remote_name:
-        remotes = conan_api.remotes.list()
+        remotes = cached_remotes_list(conan_api)
     else:
         try:
-            specific_remote = conan_api.remotes.get(remote_name)
+            specific_remote = cached_remotes_get(conan_api, remote_name)
             remotes.append(specific_remote)
             # Always include conancenter as fallback unless it's already the specified remote
             if remote_name != "conancenter":
                 try:
-                    conancenter = conan_api.remotes.get('conancenter')
+                    conancenter = cached_remotes_get(conan_api, 'conancenter')
                     remotes.append(conancenter)
                 except:
                     pass  # conancenter might not be configured
         except Exception as e:
-            print(f"Failed to get remote {remote_name}: {e}")
-            return PackageAvailability(
-                recipe_status="error",
-                binary_status="error"
-            )
-
-    # Remove the remotes that are not authenticated
-    for remote in remotes[:]:  # Copy the list to avoid modification during iteration
-        if not is_authenticated(conan_api, remote):
-            print(f"Not authenticated to remote {remote.name}")
-            remotes.remove(remote)
-
-    # Load the root consumer conanfile to get the root node
-    # We don't use load_graph_consumer because we don't want to fail if the dependency graph fails
-    # We will load each requirement separately below
-    root_node = conan_api.graph._load_root_consumer_conanfile(file_path, profile_host, profile_build,
-                                                              name=None, version=None, user=None,
-                                                              channel=None, lockfile=None,
-                                                              remotes=remotes, update=None,
-                                                              is_build_require=False)
+            logger.warning("Failed to get remote %s: %s", remote_name, e)
+            raise
+
+    # Remove the remotes that are not authenticated, all remotes are checked at once
+    authenticated = await asyncio.gather(
+        *[is_authenticated(conan_api, remote) for remote in remotes])
+    for remote, is_remote_authenticated in zip(remotes, authenticated):
+        if not is_remote_authenticated:
+            logger.debug("Not authenticated to remote %s", remote.name)
+    remotes = [remote for remote, is_remote_authenticated in zip(
+        remotes, authenticated) if is_remote_authenticated]
 
     # Create dependency graph
-    root_deps_graph = conan_api.graph.load_graph_consumer(
-        file_path,  name=None, version=None, user=None,
-        channel=None, profile_host=profile_host, profile_build=profile_build, lockfile=None, remotes=remotes, update=None
-    )
+    async with cache_lock:
+        root_deps_graph = await asyncio.to_thread(
+            conan_api.graph.load_graph_consumer,
+            file_path,  name=None, version=None, user=None,
+            channel=None, profile_host=profile_host, profile_build=profile_build, lockfile=None, remotes=remotes, update=None
+        )
+    root_ref = root_deps_graph.root.ref
 
-    recipe = ConanRecipe(
-        name=root_node.ref.name if root_node.ref else "unknown",
+    recipe = ConanRecipe.model_construct(
+        name=root_ref.name if root_ref else "unknown",
         version=str(
-            root_node.ref.version) if root_node.ref and root_node.ref.version else "unknown",
-        ref=str(root_node.ref) if root_node.ref else "unknown",
+            root_ref.version) if root_ref and root_ref.version else "unknown",
+        ref=str(root_ref) if root_ref else "unknown",
         id="unknown",
-        type="producer" if root_node.ref else "consumer",
+        type="producer" if root_ref else "consumer",
         error=None,
         dependencies=[]
     )
 
-    if root_deps_graph.error:
-        if isinstance(root_deps_graph.error, GraphConflictError):
-            recipe.error = str(root_deps_graph.error)
+    if not root_deps_graph.error:
+        # The whole graph resolved, analyze it once instead of once per requirement
+        async with cache_lock:
+            await asyncio.to_thread(
+                conan_api.graph.analyze_binaries,
+                root_deps_graph,
+                # Don't build anything, just analyze what exists
+                build_mode=['never'],
+                remotes=remotes,
+                update=None,
+                lockfile=None,
+                build_modes_test=None,
+                tested_graph=None
+            )
+
+        # Shared between the root requirements, common transitive dependencies are resolved once
+        memo = {}
+        return recipe, [create_package_from_node(conan_api, edge.dst, remotes, profile_host=profile_host, memo=memo,
+                                                 check_remotes_when_cached=check_remotes_when_cached)
+                        for edge in root_deps_graph.root.edges]
+
+    if isinstance(root_deps_graph.error, GraphConflictError):
+        recipe.error = str(root_deps_graph.error)
+
+    # The dependency graph failed, load each requirement separately so that
+    # a failing requirement does not hide the status of the other ones
+    async with cache_lock:
+        root_node = await asyncio.to_thread(conan_api.graph._load_root_consumer_conanfile,
+                                            file_path, profile_host, profile_build,
+                                            name=None, version=None, user=None,
+                                            channel=None, lockfile=None,
+                                            remotes=remotes, update=None,
+                                            is_build_require=False)
 
     # Load the requires
     DepsGraphBuilder._prepare_node(
         root_node, profile_host, profile_build, Options(), True)
 
-    requires_packages = []
+    # Loading a graph may write recipes into the Conan cache so the graphs are loaded one
+    # at a time, the availability checks of all the requirements then run concurrently
+    requires_packages: List[Union[List[ConanPackage], Node]] = []
     for requires in root_node.conanfile.requires.values():
-        deps_graph = conan_api.graph.load_graph_requires(requires=[requires.ref], tool_requires=None, profile_host=profile_host,
-                                                         profile_build=profile_build, lockfile=None, remotes=remotes, update=None)
+        async with cache_lock:
+            deps_graph = await asyncio.to_thread(conan_api.graph.load_graph_requires,
+                                                 requires=[requires.ref], tool_requires=None, profile_host=profile_host,
+                                                 profile_build=profile_build, lockfile=None, remotes=remotes, update=None)
 
         if isinstance(deps_graph.error, GraphMissingError):
 
-            availability = PackageAvailability(
+            availability = PackageAvailability.model_construct(
                 is_incompatible=False,
                 incompatible_reason=None,
-                local_status=PackageLocalStatus(
+                local_status=PackageLocalStatus.model_construct(
                     recipe_status='none',
                     binary_status='none'
                 ),
                 remotes_status=[]
             )
 
-            missing_package = ConanPackage(
+            missing_package = ConanPackage.model_construct(
                 name=requires.ref.name,
                 version=str(
                     requires.ref.version) if requires.ref.version else "none",
                 ref=str(requires.ref),
                 id="none",
-                type="dependency",
                 dependencies=[],
                 availability=availability
             )
-            requires_packages.append(missing_package)
+            requires_packages.append([missing_package])
 
         if not deps_graph.error:
             # Analyze binaries to see what's available
-            conan_api.graph.analyze_binaries(
-                deps_graph,
-                # Don't build anything, just analyze what exists
-                build_mode=['never'],
-                remotes=remotes,
-                update=None,
-                lockfile=None,
-                build_modes_test=None,
-                tested_graph=None
-            )
-
-            requires_packages.extend(create_package_from_node(
-                conan_api, deps_graph.root, remotes, profile_host=profile_host))
+            async with cache_lock:
+                await asyncio.to_thread(
+                    conan_api.graph.analyze_binaries,
+                    deps_graph,
+                    # Don't build anything, just analyze what exists
+                    build_mode=['never'],
+                    remotes=remotes,
+                    update=None,
+                    lockfile=None,
+                    build_modes_test=None,
+                    tested_graph=None
+                )
+
+            requires_packages.append(deps_graph.root)
+
+    memo = {}
+    return recipe, [create_package_from_node(conan_api, entry, remotes, profile_host=profile_host, memo=memo,
+                                             check_remotes_when_cached=check_remotes_when_cached)
+                    if isinstance(entry, Node) else _resolved(entry) for entry in requires_packages]
+
+
+async def parse_conanfile(conan_api: ConanAPI, file_path: str, host_profile: str, build_profile: str, remote_name: Optional[str] = None,
+                          check_remotes_when_cached: bool = True) -> ConanRecipe:
+    """Parse conanfile.py and extract packages with optional remote filtering."""
+    recipe, pending = await _resolve_conanfile(conan_api, file_path, host_profile, build_profile, remote_name,
+                                               check_remotes_when_cached)
 
-    recipe.dependencies = requires_packages
+    children = await asyncio.gather(*pending)
+    recipe.dependencies = [
+        package for packages in children for package in packages]
     return recipe
 
 
+def _files_key(conan_api: ConanAPI, file_path: str, host_profile: str, build_profile: str) -> Tuple[Any, ...]:
+    """Modification times of the conanfile and of the profile files (includes too) it is parsed with."""
+    return (os.stat(file_path).st_mtime_ns,
+            profile_files(conan_api, conan_api.profiles.get_path(host_profile))[0],
+            profile_files(conan_api, conan_api.profiles.get_path(build_profile))[0])
+
+
+async def parse_conanfile_shared(conan_api: ConanAPI, file_path: str, host_profile: str, build_profile: str,
+                                 remote_name: Optional[str] = None, check_remotes_when_cached: bool = True) -> ConanRecipe:
+    """parse_conanfile, sharing the result with the identical calls made while it is running."""
+    # A refresh following the save of the conanfile or of a profile must not join the computation
+    # started before, the modification times of the files are part of the key
+    files_key = await asyncio.to_thread(_files_key, conan_api, file_path, host_profile, build_profile)
+    key = (file_path, host_profile, build_profile, remote_name, check_remotes_when_cached, *files_key)
+    future = _packages_inflight.get(key)
+    if future is None:
+        future = asyncio.ensure_future(
+            parse_conanfile(conan_api, file_path, host_profile, build_profile, remote_name, check_remotes_when_cached))
+        _packages_inflight[key] = future
+
+        def forget(done: asyncio.Future):
+            # The entry may already have been cleared and replaced by a newer computation
+            if _packages_inflight.get(key) is done:
+                del _packages_inflight[key]
+        future.add_done_callback(forget)
+
+    # Shield the shared call so a cancelled caller does not cancel it for the others
+    return await asyncio.shield(future)
+
+
+def clear_packages_inflight():
+    """Make the next package tree requests start a new computation (e.g. after an install)."""
+    _packages_inflight.clear()
+
+
+def _package_key(package: ConanPackage) -> str:
+    return f"{package.ref}:{package.id}"
+
+
+def flatten_recipe(recipe: ConanRecipe) -> ConanRecipeGraph:
+    """List every package of the recipe tree once, shared dependencies are referenced by key."""
+    packages: Dict[str, ConanGraphPackage] = {}
+    stack = list(recipe.dependencies)
+    while stack:
+        package = stack.pop()
+        key = _package_key(package)
+        if key in packages:
+            continue
+        packages[key] = ConanGraphPackage.model_construct(
+            name=package.name,
+            version=package.version,
+            ref=package.ref,
+            id=package.id,
+            availability=package.availability,
+            dependencies=[_package_key(dep) for dep in package.dependencies]
+        )
+        stack.extend(package.dependencies)
+
+    return ConanRecipeGraph.model_construct(
+        name=recipe.name,
+        version=recipe.version,
+        ref=recipe.ref,
+        id=recipe.id,
+        type=recipe.type,
+        error=recipe.error,
+        dependencies=[_package_key(dep) for dep in recipe.dependencies],
+        packages=packages
+    )
+
+
 @router.get("", response_model=ConanRecipe)
 async def get_packages(
         workspace_path: str,
         host_profile: str,
         build_profile: str,
-        remote: Optional[str] = None) -> ConanRecipe:
+        remote: Optional[str] = None,
+        check_remote_when_cached: bool = True,
+        conan_api: ConanAPI = Depends(get_conan_api)) -> ConanRecipe:
     """
     Get packages from conanfile in current workspace.
 
@@ -301,74 +584,213 @@ async def get_packages(
         host_profile: Host profile name (required)
         build_profile: Build profile name (required)
         remote: Specific remote to check. If None, checks all configured remotes (optional)
+        check_remote_when_cached: Also check the remotes for the packages already in the local cache,
+            their remote status is "unknown" otherwise (optional)
 
     Returns:
         List of packages with their availability status across local cache and remote(s)
     """
-    conan_api = get_conan_api()
-    if conan_api is None:
-        raise HTTPException(
-            status_code=500, detail="Conan API not initialized")
 
     try:
         conanfile_path = find_conanfile(workspace_path)
 
-        recipe_info = await parse_conanfile(conan_api, conanfile_path, host_profile, build_profile, remote)
+        recipe_info = await parse_conanfile_shared(conan_api, conanfile_path, host_profile, build_profile, remote,
+                                                   check_remote_when_cached)
 
         return recipe_info
     except Exception as e:
+        raise conan_error_to_http(e, "Error parsing conanfile")
+
+
+@router.get("/graph", response_model=ConanRecipeGraph)
+async def get_packages_graph(
+        workspace_path: str,
+        host_profile: str,
+        build_profile: str,
+        remote: Optional[str] = None,
+        check_remote_when_cached: bool = True,
+        conan_api: ConanAPI = Depends(get_conan_api)) -> ConanRecipeGraph:
+    """
+    Same as GET /packages, but each package is listed once in a flat dictionary.
+
+    Returns:
+        Recipe whose dependencies reference the keys of its packages dictionary
+    """
+
+    try:
+        conanfile_path = find_conanfile(workspace_path)
+
+        recipe_info = await parse_conanfile_shared(conan_api, conanfile_path, host_profile, build_profile, remote,
+                                                   check_remote_when_cached)
+
+        return flatten_recipe(recipe_info)
+    except Exception as e:
+        raise conan_error_to_http(e, "Error parsing conanfile")
+
+
+@router.get("/stream")
+async def get_packages_stream(
+        workspace_path: str,
+        host_profile: str,
+        build_profile: str,
+        remote: Optional[str] = None,
+        check_remote_when_cached: bool = True,
+        conan_api: ConanAPI = Depends(get_conan_api)) -> StreamingResponse:
+    """
+    Same as GET /packages, but streamed as newline delimited JSON.
+
+    The first line is the recipe (without dependencies), then each line is one of its direct
+    dependencies (ConanPackage, with its own dependencies) as soon as its availability is known.
+    """
+
+    try:
+        conanfile_path = find_conanfile(workspace_path)
+
+        recipe, pending = await _resolve_conanfile(conan_api, conanfile_path, host_profile, build_profile, remote,
+                                                   check_remote_when_cached)
+    except Exception as e:
+        raise conan_error_to_http(e, "Error parsing conanfile")
+
+    async def lines() -> AsyncIterator[str]:
+        yield recipe.model_dump_json() + "\n"
+        for packages in asyncio.as_completed(pending):
+            for package in await packages:
+                yield package.model_dump_json() + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+def _prune_packages_tasks(tasks: Dict[str, Tuple[float, asyncio.Task]]):
+    """Drop the background /packages computations nobody fetched in time."""
+    now = time.monotonic()
+    for task_id, (created, task) in list(tasks.items()):
+        if now - created < PACKAGES_TASK_TTL:
+            continue
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled():
+            # Mark the exception as retrieved
+            task.exception()
+        del tasks[task_id]
+
+
+@router.post("/async", response_model=PackagesTaskResponse)
+async def get_packages_async(
+        request: Request,
+        workspace_path: str,
+        host_profile: str,
+        build_profile: str,
+        remote: Optional[str] = None,
+        check_remote_when_cached: bool = True,
+        conan_api: ConanAPI = Depends(get_conan_api)) -> PackagesTaskResponse:
+    """
+    Start getting packages from conanfile in current workspace in the background.
+
+    Args:
+        host_profile: Host profile name (required)
+        build_profile: Build profile name (required)
+        remote: Specific remote to check. If None, checks all configured remotes (optional)
+        check_remote_when_cached: Also check the remotes for the packages already in the local cache,
+            their remote status is "unknown" otherwise (optional)
+
+    Returns:
+        The id of the task to poll with /packages/result/{task_id}
+    """
+
+    conanfile_path = find_conanfile(workspace_path)
+
+    tasks = request.app.state.packages_tasks
+    _prune_packages_tasks(tasks)
+
+    task_id = uuid.uuid4().hex
+    tasks[task_id] = (time.monotonic(), asyncio.create_task(
+        parse_conanfile_shared(conan_api, conanfile_path, host_profile, build_profile, remote,
+                               check_remote_when_cached)))
+
+    return PackagesTaskResponse(task_id=task_id, status="running")
+
+
+@router.get("/result/{task_id}", response_model=PackagesTaskResponse)
+async def get_packages_result(request: Request, task_id: str) -> PackagesTaskResponse:
+    """
+    Get the result of a /packages/async task.
+
+    Args:
+        task_id: The id returned by /packages/async
+
+    Returns:
+        The task status, with the packages once done. A finished task can only be fetched once.
+    """
+    tasks = request.app.state.packages_tasks
+    entry = tasks.get(task_id)
+    if entry is None:
         raise HTTPException(
-            status_code=500, detail=f"Error parsing conanfile: {str(e)}")
+            status_code=404, detail=f"Unknown packages task '{task_id}'")
+
+    task = entry[1]
+    if not task.done():
+        return PackagesTaskResponse(task_id=task_id, status="running")
+
+    del tasks[task_id]
+    if task.cancelled():
+        return PackagesTaskResponse(task_id=task_id, status="error", error="Packages task was cancelled")
+    if task.exception() is not None:
+        return PackagesTaskResponse(task_id=task_id, status="error",
+                                    error=f"Error parsing conanfile: {str(task.exception())}")
+    return PackagesTaskResponse(task_id=task_id, status="done", result=task.result())
 
 
 @router.post("/install", response_model=InstallResponse)
-async def install_packages(request: InstallRequest) -> InstallResponse:
+async def install_packages(request: InstallRequest, conan_api: ConanAPI = Depends(get_conan_api)) -> InstallResponse:
     """Install packages from conanfile."""
-    conan_api = get_conan_api()
-    if conan_api is None:
-        raise HTTPException(
-            status_code=500, detail="Conan API not initialized")
 
     try:
         conanfile_path = find_conanfile(request.workspace_path)
 
         # Get profiles
-        profile_host = conan_api.profiles.get_profile(
-            [request.host_profile], {}, {}, {}, None)
-        profile_build = conan_api.profiles.get_profile(
-            [request.build_profile], {}, {}, {}, None)
+        profile_host = await asyncio.to_thread(
+            get_profile, conan_api, request.host_profile)
+        profile_build = await asyncio.to_thread(
+            get_profile, conan_api, request.build_profile)
 
         # Get remotes
-        remotes = conan_api.remotes.list()
-
-        # Create dependency graph
-        deps_graph = conan_api.graph.load_graph_consumer(
-            path=conanfile_path,
-            name=None, version=None, user=None, channel=None,
-            profile_host=profile_host,
-            profile_build=profile_build,
-            lockfile=None,
-            remotes=remotes,
-            update=["*"] if request.build_missing else None
-        )
+        remotes = cached_remotes_list(conan_api)
+
+        async with cache_lock:
+            # Create dependency graph, the same update policy is used to analyze binaries
+            update = _UPDATE_ALL if request.build_missing else None
+            deps_graph = await asyncio.to_thread(
+                conan_api.graph.load_graph_consumer,
+                path=conanfile_path,
+                name=None, version=None, user=None, channel=None,
+                profile_host=profile_host,
+                profile_build=profile_build,
+                lockfile=None,
+                remotes=remotes,
+                update=update
+            )
 
-        # Analyze binaries and determine what to build
-        build_mode = ["missing"] if request.build_missing else None
-        conan_api.graph.analyze_binaries(
-            deps_graph,
-            build_mode=build_mode,
-            remotes=remotes,
-            update=["*"] if request.build_missing else None,
-            lockfile=None,
-            build_modes_test=None,
-            tested_graph=None
-        )
+            # Analyze binaries and determine what to build
+            build_mode = ["missing"] if request.build_missing else None
+            await asyncio.to_thread(
+                conan_api.graph.analyze_binaries,
+                deps_graph,
+                build_mode=build_mode,
+                remotes=remotes,
+                update=update,
+                lockfile=None,
+                build_modes_test=None,
+                tested_graph=None
+            )
 
-        # Install binaries
-        conan_api.install.install_binaries(
-            deps_graph=deps_graph, remotes=remotes)
+            # Install binaries
+            await asyncio.to_thread(
+                conan_api.install.install_binaries,
+                deps_graph=deps_graph, remotes=remotes)
+        clear_packages_inflight()
 
-        conan_api.install.install_consumer(
+        await asyncio.to_thread(
+            conan_api.install.install_consumer,
             deps_graph=deps_graph,
             generators=None,
             source_folder=request.workspace_path,
@@ -390,49 +812,50 @@ async def install_packages(request: InstallRequest) -> InstallResponse:
 
 
 @router.post("/install/package")
-async def install_package(request: InstallPackageRequest) -> InstallResponse:
+async def install_package(request: InstallPackageRequest, conan_api: ConanAPI = Depends(get_conan_api)) -> InstallResponse:
     """Install a specific package by reference."""
-    conan_api = get_conan_api()
-    if conan_api is None:
-        raise HTTPException(
-            status_code=500, detail="Conan API not initialized")
 
     try:
         # Get profiles
-        profile_host = conan_api.profiles.get_profile(
-            [request.host_profile], {}, {}, {}, None)
-        profile_build = conan_api.profiles.get_profile(
-            [request.build_profile], {}, {}, {}, None)
+        profile_host = await asyncio.to_thread(
+            get_profile, conan_api, request.host_profile)
+        profile_build = await asyncio.to_thread(
+            get_profile, conan_api, request.build_profile)
 
         # Get remotes
-        remotes = conan_api.remotes.list()
-
-        # Create dependency graph for specific package
-        deps_graph = conan_api.graph.load_graph_requires(
-            requires=[request.package_ref],
-            tool_requires=None,
-            profile_host=profile_host,
-            profile_build=profile_build,
-            lockfile=None,
-            remotes=remotes,
-            update=["*"]
-        )
+        remotes = cached_remotes_list(conan_api)
+
+        async with cache_lock:
+            # Create dependency graph for specific package
+            deps_graph = await asyncio.to_thread(
+                conan_api.graph.load_graph_requires,
+                requires=[request.package_ref],
+                tool_requires=None,
+                profile_host=profile_host,
+                profile_build=profile_build,
+                lockfile=None,
+                remotes=remotes,
+                update=_UPDATE_ALL
+            )
 
-        # Analyze binaries and determine what to build
-        build_mode = ["missing"] if request.build_missing else None
-        conan_api.graph.analyze_binaries(
-            deps_graph,
-            build_mode=build_mode,
-            remotes=remotes,
-            update=["*"],
-            lockfile=None,
-            build_modes_test=None,
-            tested_graph=None
-        )
+            # Analyze binaries and determine what to build
+            build_mode = ["missing"] if request.build_missing else None
+            await asyncio.to_thread(
+                conan_api.graph.analyze_binaries,
+                deps_graph,
+                build_mode=build_mode,
+                remotes=remotes,
+                update=_UPDATE_ALL,
+                lockfile=None,
+                build_modes_test=None,
+                tested_graph=None
+            )
 
-        # Install binaries
-        conan_api.install.install_binaries(
-            deps_graph=deps_graph, remotes=remotes)
+            # Install binaries
+            await asyncio.to_thread(
+                conan_api.install.install_binaries,
+                deps_graph=deps_graph, remotes=remotes)
+        clear_packages_inflight()
 
         return {
             "message": f"Installation of package {request.package_ref} completed with profiles: host={request.host_profile}, build={request.build_profile}",
@@ -446,17 +869,13 @@ async def install_package(request: InstallPackageRequest) -> InstallResponse:
 
 
 @router.post("/upload/local")
-async def upload_local_package(request: UploadLocalRequest):
+async def upload_local_package(request: UploadLocalRequest, conan_api: ConanAPI = Depends(get_conan_api)):
     """Upload a specific local package to remote (synchronous)."""
-    conan_api = get_conan_api()
-    if conan_api is None:
-        raise HTTPException(
-            status_code=500, detail="Conan API not initialized")
 
     try:
         # Get the remote
-        remote = conan_api.remotes.get(request.remote_name)
-        remotes = conan_api.remotes.list()
+        remote = cached_remotes_get(conan_api, request.remote_name)
+        remotes = cached_remotes_list(conan_api)
 
         # Check if package exists locally first
         try:
@@ -465,13 +884,14 @@ async def upload_local_package(request: UploadLocalRequest):
 
             # Get specified profiles for listing
             try:
-                profile_host = conan_api.profiles.get_profile(
-                    [request.host_profile], {}, {}, {}, None)
+                profile_host = await asyncio.to_thread(
+                    get_profile, conan_api, request.host_profile)
             except Exception as e:
                 raise HTTPException(
                     status_code=400, detail=f"Failed to load host profile '{request.host_profile}': {str(e)}")
 
-            package_list = conan_api.list.select(
+            package_list = await asyncio.to_thread(
+                conan_api.list.select,
                 ref_pattern, profile=profile_host)
 
             if not package_list:
@@ -479,9 +899,14 @@ async def upload_local_package(request: UploadLocalRequest):
                     status_code=404, detail=f"Package {request.package_ref} not found in local cache")
 
             # Upload the package
-            print(f"Uploading {request.package_ref} to {request.remote_name}")
-            conan_api.upload.upload_full(
-                package_list, remote, remotes, dry_run=False)
+            logger.info("Uploading %s to %s", request.package_ref, request.remote_name)
+            async with cache_lock:
+                await asyncio.to_thread(
+                    conan_api.upload.upload_full,
+                    package_list, remote, remotes, dry_run=False)
+            # The remote now has the package, do not keep reporting it as missing
+            clear_remote_checks_cache(request.remote_name)
+            clear_packages_inflight()
 
             return {
                 "message": f"Successfully uploaded {request.package_ref} to {request.remote_name}",
@@ -489,9 +914,7 @@ async def upload_local_package(request: UploadLocalRequest):
             }
 
         except ConanException as e:
-            raise HTTPException(
-                status_code=500, detail=f"Conan API error: {str(e)}")
+            raise conan_error_to_http(e, "Conan API error")
 
     except Exception as e:
-        raise HTTPException(
-            status_code=500, detail=f"Error uploading package: {str(e)}")
+        raise conan_error_to_http(e, "Error uploading package")
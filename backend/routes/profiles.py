@@ -1,56 +1,95 @@
+import asyncio
+import logging
 import os
 from typing import List, Optional
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from conan.api.conan_api import ConanAPI
 
 from models.conan_models import ConanProfile, ProfileCreateRequest
-from dependencies.conan_deps import get_conan_api
+from dependencies.conan_deps import get_conan_api, clear_profile_cache
+from conan_utils import make_etag
 
 router = APIRouter(prefix="/profiles", tags=["profiles"])
 
+logger = logging.getLogger(__name__)
+
+# Sections written after the settings of a new profile
+_PROFILE_EMPTY_SECTIONS = "\n\n[options]\n\n[tool_requires]\n\n[conf]"
+
+
+def _list_profiles(conan_api: ConanAPI, local_profiles_path: Optional[str]) -> List[ConanProfile]:
+    """List the global profiles and the ones of the local profiles directory, if any."""
+    profiles = []
+
+    # Get global profiles from Conan
+    profile_names = conan_api.profiles.list()
+    for profile_name in profile_names:
+        try:
+            profile_path = conan_api.profiles.get_path(profile_name)
+            profiles.append(ConanProfile(
+                name=profile_name,
+                path=profile_path,
+                isLocal=False
+            ))
+        except Exception as e:
+            logger.warning("Error processing global profile %s: %s", profile_name, e)
+            continue
+
+    # Get local profiles if path is specified
+    if local_profiles_path:
+        try:
+            # Convert relative path to absolute
+            if not os.path.isabs(local_profiles_path):
+                local_profiles_path = os.path.abspath(local_profiles_path)
+
+            # A single directory read, the entries know their type without an extra stat
+            with os.scandir(local_profiles_path) as entries:
+                for entry in entries:
+                    if entry.is_file() and not entry.name.startswith('.'):
+                        profiles.append(ConanProfile(
+                            name=entry.name,
+                            path=entry.path,
+                            isLocal=True
+                        ))
+        except (FileNotFoundError, NotADirectoryError):
+            # No local profiles directory
+            pass
+        except Exception as e:
+            logger.warning("Error scanning local profiles directory: %s", e)
+
+    return profiles
+
+
+def _profiles_etag(profiles: List[ConanProfile]) -> str:
+    """Entity tag of a profiles list, Conan lists the profiles of subdirectories too."""
+    return make_etag(sorted((profile.name, profile.path, profile.isLocal) for profile in profiles))
+
+
+def _write_profile(profiles_path: str, name: str, content: str) -> str:
+    """Write a profile file into the profiles directory, creating it if needed."""
+    os.makedirs(profiles_path, exist_ok=True)
+    profile_file_path = os.path.join(profiles_path, name)
+    with open(profile_file_path, 'w') as f:
+        f.write(content)
+    return profile_file_path
+
 
 @router.get("", response_model=List[ConanProfile])
-async def get_profiles(local_profiles_path: Optional[str] = None) -> List[ConanProfile]:
+async def get_profiles(request: Request,
+                       response: Response,
+                       local_profiles_path: Optional[str] = None,
+                       conan_api: ConanAPI = Depends(get_conan_api)) -> List[ConanProfile]:
     """Get available Conan profiles."""
-    conan_api = get_conan_api()
-    if conan_api is None:
-        raise HTTPException(status_code=500, detail="Conan API not initialized")
 
     try:
-        profiles = []
-
-        # Get global profiles from Conan
-        profile_names = conan_api.profiles.list()
-        for profile_name in profile_names:
-            try:
-                profile_path = conan_api.profiles.get_path(profile_name)
-                profiles.append(ConanProfile(
-                    name=profile_name,
-                    path=profile_path,
-                    isLocal=False
-                ))
-            except Exception as e:
-                print(f"Error processing global profile {profile_name}: {e}")
-                continue
-
-        # Get local profiles if path is specified
-        if local_profiles_path:
-            try:
-                # Convert relative path to absolute
-                if not os.path.isabs(local_profiles_path):
-                    local_profiles_path = os.path.abspath(local_profiles_path)
-
-                if os.path.exists(local_profiles_path) and os.path.isdir(local_profiles_path):
-                    for filename in os.listdir(local_profiles_path):
-                        filepath = os.path.join(local_profiles_path, filename)
-                        if os.path.isfile(filepath) and not filename.startswith('.'):
-                            profiles.append(ConanProfile(
-                                name=filename,
-                                path=filepath,
-                                isLocal=True
-                            ))
-            except Exception as e:
-                print(f"Error scanning local profiles directory: {e}")
-
+        # Listing the profiles reads directories, keep the event loop free meanwhile
+        profiles = await asyncio.to_thread(_list_profiles, conan_api, local_profiles_path)
+
+        # The client already has this list, spare sending it again
+        etag = _profiles_etag(profiles)
+        if request.headers.get("if-none-match") == etag:
+            return Response(status_code=304, headers={"ETag": etag})
+        response.headers["ETag"] = etag
         return profiles
     except Exception as e:
         raise HTTPException(
@@ -58,11 +97,8 @@ async def get_profiles(local_profiles_path: Optional[str] = None) -> List[ConanP
 
 
 @router.post("/create")
-async def create_profile(request: ProfileCreateRequest):
+async def create_profile(request: ProfileCreateRequest, conan_api: ConanAPI = Depends(get_conan_api)):
     """Create a new Conan profile."""
-    conan_api = get_conan_api()
-    if conan_api is None:
-        raise HTTPException(status_code=500, detail="Conan API not initialized")
 
     try:
         # Determine the profiles directory path
@@ -76,47 +112,29 @@ async def create_profile(request: ProfileCreateRequest):
             # Use global profiles path
             profiles_path = os.path.join(conan_api.config.home(), "profiles")
 
-        os.makedirs(profiles_path, exist_ok=True)
-        profile_file_path = os.path.join(profiles_path, request.name)
-
         # Create profile content
-        profile_content = []
-
+        settings = {}
         if request.detect and not request.settings:
             # Auto-detect settings for the profile
             try:
                 from conan.internal.api.detect import detect_api
-                detected_settings = detect_api(conan_api)
-
-                # Convert detected settings to profile format
-                profile_content.append("[settings]")
-                for key, value in detected_settings.items():
-                    if value is not None:
-                        profile_content.append(f"{key}={value}")
+                settings = await asyncio.to_thread(detect_api, conan_api)
             except Exception as e:
-                print(f"Error auto-detecting settings: {e}")
+                logger.warning("Error auto-detecting settings: %s", e)
                 # Fall back to basic profile creation
-                profile_content.append("[settings]")
         else:
             # Use provided settings
-            profile_content.append("[settings]")
-            for key, value in request.settings.items():
-                if value is not None:
-                    profile_content.append(f"{key}={value}")
-
-        # Add empty sections for completeness
-        profile_content.extend([
-            "",
-            "[options]",
-            "",
-            "[tool_requires]",
-            "",
-            "[conf]"
-        ])
+            settings = request.settings
+
+        # Convert settings to profile format, followed by empty sections for completeness
+        profile_content = "\n".join(
+            ["[settings]", *(f"{key}={value}" for key, value in settings.items() if value is not None)])
+        profile_content += _PROFILE_EMPTY_SECTIONS
 
         # Write profile to file
-        with open(profile_file_path, 'w') as f:
-            f.write('\n'.join(profile_content))
+        profile_file_path = await asyncio.to_thread(
+            _write_profile, profiles_path, request.name, profile_content)
+        clear_profile_cache()
 
         return {"message": f"Profile '{request.name}' created successfully", "path": profile_file_path}
     except Exception as e:
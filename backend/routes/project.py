@@ -1,9 +1,13 @@
-from fastapi import APIRouter, HTTPException
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException
+from conan.api.conan_api import ConanAPI
+from conan.api.model import RecipeReference
+from conan.cli.commands.test import run_test
+from conan.errors import ConanException
 from pydantic import BaseModel
-from dependencies.conan_deps import find_conanfile, get_conan_api
-import os
-import subprocess
-import sys
+from dependencies.conan_deps import find_conanfile, get_conan_api, get_profile
+from conan_utils import cached_remotes_list, cache_lock
+from routes.packages import clear_packages_inflight
 
 router = APIRouter(prefix="/project", tags=["project"])
 
@@ -16,56 +20,58 @@ class ProjectOperationRequest(BaseModel):
 
 
 @router.post("/create")
-async def create_package(request: ProjectOperationRequest):
+async def create_package(request: ProjectOperationRequest, conan_api: ConanAPI = Depends(get_conan_api)):
     """Create the package in the workspace."""
-    conan_api = get_conan_api()
-    if conan_api is None:
-        raise HTTPException(
-            status_code=500, detail="Conan API not initialized")
 
     try:
 
         conanfile_path = find_conanfile(request.workspace_path)
 
         # Get profiles
-        profile_host = conan_api.profiles.get_profile(
-            [request.host_profile], {}, {}, {}, None)
-        profile_build = conan_api.profiles.get_profile(
-            [request.build_profile], {}, {}, {}, None)
+        profile_host = await asyncio.to_thread(
+            get_profile, conan_api, request.host_profile)
+        profile_build = await asyncio.to_thread(
+            get_profile, conan_api, request.build_profile)
 
         # Get remotes
-        remotes = conan_api.remotes.list()
-
-        ref, conanfile = conan_api.export.export(path=conanfile_path,
-                                                 name=None, version=None, user=None, channel=None,
-                                                 lockfile=None,
-                                                 remotes=remotes)
-
-        # Create dependency graph
-        deps_graph = conan_api.graph.load_graph_requires(
-            requires=[ref],
-            tool_requires=None,
-            profile_host=profile_host,
-            profile_build=profile_build,
-            lockfile=None,
-            remotes=remotes,
-            update=None
-        )
+        remotes = cached_remotes_list(conan_api)
+
+        async with cache_lock:
+            ref, conanfile = await asyncio.to_thread(conan_api.export.export,
+                                                     path=conanfile_path,
+                                                     name=None, version=None, user=None, channel=None,
+                                                     lockfile=None,
+                                                     remotes=remotes)
+
+            # Create dependency graph
+            deps_graph = await asyncio.to_thread(
+                conan_api.graph.load_graph_requires,
+                requires=[ref],
+                tool_requires=None,
+                profile_host=profile_host,
+                profile_build=profile_build,
+                lockfile=None,
+                remotes=remotes,
+                update=None
+            )
 
-        # Analyze binaries and determine what to build
-        conan_api.graph.analyze_binaries(
-            deps_graph,
-            build_mode=[f'missing:{str(ref)}'],
-            remotes=remotes,
-            update=None,
-            lockfile=None,
-            build_modes_test=None,
-            tested_graph=None
-        )
+            # Analyze binaries and determine what to build
+            await asyncio.to_thread(
+                conan_api.graph.analyze_binaries,
+                deps_graph,
+                build_mode=[f'missing:{str(ref)}'],
+                remotes=remotes,
+                update=None,
+                lockfile=None,
+                build_modes_test=None,
+                tested_graph=None
+            )
 
-        # Install binaries
-        conan_api.install.install_binaries(
-            deps_graph=deps_graph, remotes=remotes)
+            # Install binaries
+            await asyncio.to_thread(
+                conan_api.install.install_binaries,
+                deps_graph=deps_graph, remotes=remotes)
+        clear_packages_inflight()
 
     except Exception as e:
         raise HTTPException(
@@ -74,45 +80,47 @@ async def create_package(request: ProjectOperationRequest):
         )
 
 
+def _run_test_package(conan_api: ConanAPI, workspace_path: str, host_profile: str, build_profile: str):
+    """Run the test_package of the recipe in the workspace like `conan test` does."""
+    conanfile_path = conan_api.local.get_conanfile_path(".", workspace_path, py=True)
+    test_conanfile_path = conan_api.local.get_conanfile_path("test_package", workspace_path, py=True)
+
+    profile_host = get_profile(conan_api, host_profile)
+    profile_build = get_profile(conan_api, build_profile)
+    remotes = cached_remotes_list(conan_api)
+
+    # The tested reference is the recipe of the workspace, in its latest exported revision
+    conanfile = conan_api.local.inspect(conanfile_path, remotes=remotes, lockfile=None)
+    ref = RecipeReference(conanfile.name, conanfile.version, conanfile.user, conanfile.channel)
+
+    # The Conan output goes to the server log like for the other operations
+    run_test(conan_api, test_conanfile_path, ref, profile_host, profile_build,
+             remotes=remotes, lockfile=None, update=None, build_modes=None,
+             tested_python_requires=ref)
+
+
 @router.post("/test")
-async def test_package(request: ProjectOperationRequest):
+async def test_package(request: ProjectOperationRequest, conan_api: ConanAPI = Depends(get_conan_api)):
     """Test the package in the workspace."""
-    conan_api = get_conan_api()
-    if conan_api is None:
-        raise HTTPException(
-            status_code=500, detail="Conan API not initialized")
 
     try:
-        # Change to workspace directory
-        original_dir = os.getcwd()
-        os.chdir(request.workspace_path)
-
-        # Test command args
-        cmd = [
-            sys.executable, "-c", "from conan.api.conan_api import ConanAPI; "
-            f"ConanAPI().test.test_package(['.'], host_profile='{request.host_profile}', "
-            f"build_profile='{request.build_profile}')"
-        ]
-
-        # Run the test command
-        result = subprocess.run(cmd, capture_output=True, text=True)
-
-        if result.returncode != 0:
-            raise HTTPException(
-                status_code=400,
-                detail=f"Test failed: {result.stderr}"
-            )
-
-        return {
-            "success": True,
-            "message": "Package tested successfully",
-            "output": result.stdout
-        }
-
+        # The test builds the package into the cache like the other build operations
+        async with cache_lock:
+            await asyncio.to_thread(
+                _run_test_package, conan_api, request.workspace_path,
+                request.host_profile, request.build_profile)
+    except ConanException as e:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Test failed: {str(e)}"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=500,
             detail=f"Test operation failed: {str(e)}"
         )
-    finally:
-        os.chdir(original_dir)
+
+    return {
+        "success": True,
+        "message": "Package tested successfully"
+    }
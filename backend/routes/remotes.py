@@ -1,11 +1,17 @@
+import asyncio
 from typing import List
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
 
 from models.conan_models import ConanRemote, RemoteAddRequest, RemoteLoginRequest, RemoveRemoteRequest
 from dependencies.conan_deps import get_conan_api
-from conan_utils import is_authenticated
+from conan_utils import (
+    is_authenticated, clear_authentication_cache, clear_remote_checks_cache,
+    cached_remotes_list, cached_remotes_get, clear_remotes_cache, conan_error_to_http
+)
+from routes.packages import clear_packages_inflight
 
 try:
+    from conan.api.conan_api import ConanAPI
     from conan.api.model import Remote
 except ImportError:
     print("ERROR: Conan Python API not found. Make sure Conan 2.x is installed.")
@@ -14,91 +20,87 @@ router = APIRouter(prefix="/remotes", tags=["remotes"])
 
 
 @router.get("", response_model=List[ConanRemote])
-async def get_remotes() -> List[ConanRemote]:
+async def get_remotes(conan_api: ConanAPI = Depends(get_conan_api)) -> List[ConanRemote]:
     """Get configured Conan remotes."""
-    conan_api = get_conan_api()
-    if conan_api is None:
-        raise HTTPException(status_code=500, detail="Conan API not initialized")
 
     try:
-        remotes_list = conan_api.remotes.list()
+        remotes_list = cached_remotes_list(conan_api)
         remotes = []
 
-        for remote in remotes_list:
-            # Check if authentication is required for this remote
-            requires_auth = not is_authenticated(conan_api, remote)
+        # Check if authentication is required for the remotes, all remotes are checked at once
+        authenticated = await asyncio.gather(
+            *[is_authenticated(conan_api, remote) for remote in remotes_list])
 
+        for remote, is_remote_authenticated in zip(remotes_list, authenticated):
             remotes.append(ConanRemote(
                 name=remote.name,
                 url=remote.url,
                 verify_ssl=remote.verify_ssl,
-                requires_auth=requires_auth
+                requires_auth=not is_remote_authenticated
             ))
 
         return remotes
     except Exception as e:
-        raise HTTPException(
-            status_code=500, detail=f"Error getting remotes: {str(e)}")
+        raise conan_error_to_http(e, "Error getting remotes")
 
 
 @router.post("/add")
-async def add_remote(request: RemoteAddRequest):
+async def add_remote(request: RemoteAddRequest, conan_api: ConanAPI = Depends(get_conan_api)):
     """Add a new Conan remote."""
-    conan_api = get_conan_api()
-    if conan_api is None:
-        raise HTTPException(status_code=500, detail="Conan API not initialized")
 
     try:
         # Create a new remote object
         new_remote = Remote(request.name, request.url, request.verify_ssl)
 
         # Add the remote using the API
-        conan_api.remotes.add(new_remote)
+        await asyncio.to_thread(conan_api.remotes.add, new_remote)
+        clear_remotes_cache()
+        clear_authentication_cache(request.name)
+        clear_remote_checks_cache()
+        clear_packages_inflight()
 
         # Check if authentication is required for this remote
-        requires_auth = not is_authenticated(conan_api, new_remote)
+        requires_auth = not await is_authenticated(conan_api, new_remote)
 
         return {"success": True, "requires_auth": requires_auth}
     except Exception as e:
-        raise HTTPException(
-            status_code=500, detail=f"Error adding remote: {str(e)}")
+        raise conan_error_to_http(e, "Error adding remote")
 
 
 @router.post("/login")
-async def login_remote(request: RemoteLoginRequest):
+async def login_remote(request: RemoteLoginRequest, conan_api: ConanAPI = Depends(get_conan_api)):
     """Login to a Conan remote."""
-    conan_api = get_conan_api()
-    if conan_api is None:
-        raise HTTPException(status_code=500, detail="Conan API not initialized")
 
     try:
         # Get the remote
-        remote = conan_api.remotes.get(request.name)
+        remote = cached_remotes_get(conan_api, request.name)
         if not remote:
             raise HTTPException(
                 status_code=404, detail=f"Remote '{request.name}' not found")
 
         # Perform login
-        conan_api.remotes.user_login(remote, request.user, request.password)
+        await asyncio.to_thread(conan_api.remotes.user_login, remote, request.user, request.password)
+        clear_authentication_cache(request.name)
+        clear_remote_checks_cache()
+        clear_packages_inflight()
 
         return {"success": True, "message": f"Logged in to remote '{request.name}' successfully"}
     except Exception as e:
-        raise HTTPException(
-            status_code=500, detail=f"Error logging in to remote: {str(e)}")
+        raise conan_error_to_http(e, "Error logging in to remote")
 
 
 @router.post("/remove")
-async def remove_remote(request: RemoveRemoteRequest):
+async def remove_remote(request: RemoveRemoteRequest, conan_api: ConanAPI = Depends(get_conan_api)):
     """Remove a Conan remote."""
-    conan_api = get_conan_api()
-    if conan_api is None:
-        raise HTTPException(status_code=500, detail="Conan API not initialized")
 
     try:
         # Remove the remote using the API
-        conan_api.remotes.remove(request.name)
+        await asyncio.to_thread(conan_api.remotes.remove, request.name)
+        clear_remotes_cache()
+        clear_authentication_cache(request.name)
+        clear_remote_checks_cache()
+        clear_packages_inflight()
 
         return {"success": True}
     except Exception as e:
-        raise HTTPException(
-            status_code=500, detail=f"Error removing remote: {str(e)}")
\ No newline at end of file
+        raise conan_error_to_http(e, "Error removing remote")
\ No newline at end of file
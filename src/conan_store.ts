@@ -19,8 +19,9 @@ export type PackageItemType =
 export type PackageLocalRecipeStatus = 'none' | 'cache' | 'consumer';
 export type PackageLocalBinaryStatus = 'none' | 'cache';
 
-export type PackageRemoteRecipeStatus = 'none' | 'available';
-export type PackageRemoteBinaryStatus = 'none' | 'available';
+// 'unknown' when the remote could not be checked (throttled, unreachable or skipped)
+export type PackageRemoteRecipeStatus = 'none' | 'available' | 'unknown';
+export type PackageRemoteBinaryStatus = 'none' | 'available' | 'unknown';
 
 export interface PackageLocalStatus {
     recipe_status: PackageLocalRecipeStatus;
@@ -1,10 +1,17 @@
 import * as vscode from 'vscode';
-import { PackageInfo, PackageItemType, Remote } from '../conan_store';
+import { PackageInfo, PackageItemType, PackageRemoteBinaryStatus, PackageRemoteRecipeStatus, Remote } from '../conan_store';
 
 function get_ref(pkg: PackageInfo): string {
     return `${pkg.name}/${pkg.version}`;
 }
 
+function remoteStatusIcon(status: PackageRemoteRecipeStatus | PackageRemoteBinaryStatus): string {
+    if (status === 'available') {
+        return '✅';
+    }
+    return status === 'unknown' ? '❔' : '❌';
+}
+
 export class ConanPackageItem extends vscode.TreeItem {
 
     get ref(): string {
@@ -72,8 +79,8 @@ export class ConanPackageItem extends vscode.TreeItem {
                 const isActiveRemote = (activeRemote !== 'all' && remoteStatus.remote_name === activeRemote.name);
                 const remoteLabel = isActiveRemote ? `${remoteStatus.remote_name} (active)` : remoteStatus.remote_name;
                 tooltip += `\t- ${remoteLabel}:\n`;
-                tooltip += `\t\t🔨 Recipe: ${remoteStatus.recipe_status === 'available' ? '✅' : '❌'}\n`;
-                tooltip += `\t\t📦 Binary: ${remoteStatus.binary_status === 'available' ? '✅' : '❌'}\n`;
+                tooltip += `\t\t🔨 Recipe: ${remoteStatusIcon(remoteStatus.recipe_status)}\n`;
+                tooltip += `\t\t📦 Binary: ${remoteStatusIcon(remoteStatus.binary_status)}\n`;
             }
 
             // Only show incompatible warning if it's actually incompatible
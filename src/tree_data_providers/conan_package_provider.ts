@@ -13,6 +13,8 @@ function getPackageRemoteStatus(remotesStatus: PackageRemoteStatus[], activeRemo
                 return 'recipe+binary'; // Highest availability found
             } else if (status.recipe_status === 'available' && highestStatus !== 'recipe+binary') {
                 highestStatus = 'recipe'; // Update to recipe if not already at highest
+            } else if ((status.recipe_status === 'unknown' || status.binary_status === 'unknown') && highestStatus === 'none') {
+                highestStatus = 'unknown'; // A remote could not be checked, it may have the package
             }
         }
         return highestStatus;
@@ -21,6 +23,8 @@ function getPackageRemoteStatus(remotesStatus: PackageRemoteStatus[], activeRemo
             if (status.remote_name === activeRemote.name) {
                 if (status.recipe_status === 'available' && status.binary_status === 'available') {
                     return 'recipe+binary';
+                } else if (status.recipe_status === 'unknown' || status.binary_status === 'unknown') {
+                    return 'unknown'; // The remote could not be checked
                 } else if (status.recipe_status === 'available') {
                     return 'recipe';
                 }
@@ -225,8 +229,9 @@ export class ConanPackageProvider implements vscode.TreeDataProvider<ConanPackag
             return 'package-incompatible';
         } else if (localStatus === 'recipe+binary' && remoteStatus === 'recipe+binary') {
             return 'package-available'; // Package available both remotely and locally
-        } else if (this.conanStore.activeRemote !== 'all' && localStatus === 'recipe+binary' && remoteStatus !== 'recipe+binary') {
-            // Only show uploadable if a specific remote is selected and package otherwise we could not know where to upload
+        } else if (this.conanStore.activeRemote !== 'all' && localStatus === 'recipe+binary' && (remoteStatus === 'none' || remoteStatus === 'recipe')) {
+            // Only show uploadable if a specific remote is selected and package otherwise we could not know where to upload,
+            // and if the remote is known to miss the binary (an unknown status shows the package as unknown)
             return 'package-uploadable'; // Package available for upload
         } else if (remoteStatus === 'recipe+binary' && localStatus !== 'recipe+binary') {
             return 'package-downloadable'; // Package available for download